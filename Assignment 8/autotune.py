@@ -0,0 +1,212 @@
+import math
+
+import numpy as np
+
+from sweep import SweepJob, run_sweep, worker_pool
+
+# ------------------ Objective ------------------
+DEFAULT_GAINS = {"Kp": 2.0, "Ki": 0.5, "Kd": 4, "theta_CB": 30, "frame_delay": 0}
+
+
+class CaptureTimeObjective:
+    # Mean time_to_capture of one gain setting over a scenario set; a timeout counts as `duration`.
+    # Every setting in a batch is run in a single run_sweep call, and repeated points are not re-run.
+    # Pass a long-lived executor (as auto_tune does) so one-point evaluations do not start a pool each.
+    def __init__(self, strategy, scenarios, names, target_path="sinusoidal", fixed=None, duration=60,
+                 **sweep_kwargs):
+        self.strategy = strategy
+        self.scenarios = list(scenarios)
+        self.names = list(names)
+        self.target_path = target_path
+        self.fixed = dict(DEFAULT_GAINS, **(fixed or {}))
+        self.duration = duration
+        self.sweep_kwargs = sweep_kwargs
+        self.history = []  # (params dict, score) in evaluation order
+        self._seen = {}
+
+    def __call__(self, points):
+        points = [tuple(float(v) for v in p) for p in points]
+        new = list(dict.fromkeys(p for p in points if p not in self._seen))
+        if new:
+            jobs = [self._job(p, scenario) for p in new for scenario in self.scenarios]
+            results = run_sweep(jobs, duration=self.duration, **self.sweep_kwargs)
+            n = len(self.scenarios)
+            for k, p in enumerate(new):
+                times = [self.duration if r["time_to_capture"] is None else r["time_to_capture"]
+                         for r in results[k * n:(k + 1) * n]]
+                self._seen[p] = float(np.mean(times))
+                self.history.append((dict(zip(self.names, p)), self._seen[p]))
+        return [self._seen[p] for p in points]
+
+    def _job(self, point, scenario):
+        gains = dict(self.fixed, **dict(zip(self.names, point)))
+        return SweepJob(self.strategy, gains["Kp"], gains["Ki"], gains["Kd"], gains["theta_CB"],
+                        int(gains["frame_delay"]), self.target_path, scenario)
+
+    @property
+    def evaluations(self):
+        return len(self._seen)
+
+
+# ------------------ Search Methods ------------------
+# All methods search the unit box [0, 1]^d; `to_params` maps a unit point back to the real bounds.
+
+def golden_section(f, max_evals=20, tol=1e-3):
+    inv_phi = (math.sqrt(5) - 1) / 2
+    a, b = 0.0, 1.0
+    c, d = b - inv_phi * (b - a), a + inv_phi * (b - a)
+    fc, fd = f([[c], [d]])
+    evals = 2
+    while evals < max_evals and b - a > tol:
+        if fc < fd:
+            b, d, fd = d, c, fc
+            c = b - inv_phi * (b - a)
+            fc, = f([[c]])
+        else:
+            a, c, fc = c, d, fd
+            d = a + inv_phi * (b - a)
+            fd, = f([[d]])
+        evals += 1
+    return [c] if fc < fd else [d]
+
+
+def nelder_mead(f, dim, max_evals=40, tol=1e-3, start=None):
+    start = np.full(dim, 0.5) if start is None else np.asarray(start, dtype=float)
+    simplex = [start] + [np.clip(start + 0.25 * np.eye(dim)[i], 0, 1) for i in range(dim)]
+    scores = f(simplex)
+    evals = len(simplex)
+
+    def evaluate(point):
+        nonlocal evals
+        evals += 1
+        return f([point])[0]
+
+    while evals < max_evals:
+        order = np.argsort(scores)
+        simplex = [simplex[i] for i in order]
+        scores = [scores[i] for i in order]
+        if np.max(np.abs(np.array(simplex[1:]) - simplex[0])) < tol:
+            break
+
+        centroid = np.mean(simplex[:-1], axis=0)
+        reflected = np.clip(centroid + (centroid - simplex[-1]), 0, 1)
+        f_reflected = evaluate(reflected)
+        if f_reflected < scores[0]:
+            expanded = np.clip(centroid + 2 * (centroid - simplex[-1]), 0, 1)
+            f_expanded = evaluate(expanded)
+            simplex[-1], scores[-1] = (expanded, f_expanded) if f_expanded < f_reflected else (reflected, f_reflected)
+        elif f_reflected < scores[-2]:
+            simplex[-1], scores[-1] = reflected, f_reflected
+        else:
+            contracted = centroid + 0.5 * (simplex[-1] - centroid)
+            f_contracted = evaluate(contracted)
+            if f_contracted < scores[-1]:
+                simplex[-1], scores[-1] = contracted, f_contracted
+            else:
+                # Shrink towards the best point
+                simplex = [simplex[0]] + [simplex[0] + 0.5 * (p - simplex[0]) for p in simplex[1:]]
+                scores = [scores[0]] + f(simplex[1:])
+                evals += dim
+
+    return list(simplex[int(np.argmin(scores))])
+
+
+def cma_es(f, dim, max_evals=60, sigma=0.3, seed=0):
+    # Compact (mu/mu_w, lambda)-CMA-ES; each generation is evaluated as one batch
+    rng = np.random.default_rng(seed)
+    lam = 4 + int(3 * math.log(dim))
+    mu = lam // 2
+    weights = math.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+    weights /= weights.sum()
+    mu_eff = 1 / np.sum(weights ** 2)
+
+    c_sigma = (mu_eff + 2) / (dim + mu_eff + 5)
+    d_sigma = 1 + 2 * max(0, math.sqrt((mu_eff - 1) / (dim + 1)) - 1) + c_sigma
+    c_c = (4 + mu_eff / dim) / (dim + 4 + 2 * mu_eff / dim)
+    c_1 = 2 / ((dim + 1.3) ** 2 + mu_eff)
+    c_mu = min(1 - c_1, 2 * (mu_eff - 2 + 1 / mu_eff) / ((dim + 2) ** 2 + mu_eff))
+    chi_n = math.sqrt(dim) * (1 - 1 / (4 * dim) + 1 / (21 * dim ** 2))
+
+    mean = np.full(dim, 0.5)
+    cov = np.eye(dim)
+    p_sigma = np.zeros(dim)
+    p_c = np.zeros(dim)
+    best, best_score = mean, math.inf
+    evals = 0
+    generation = 0
+    while evals + lam <= max_evals:
+        eigvals, eigvecs = np.linalg.eigh(cov)
+        sqrt_cov = eigvecs @ np.diag(np.sqrt(np.maximum(eigvals, 1e-20))) @ eigvecs.T
+        inv_sqrt_cov = eigvecs @ np.diag(1 / np.sqrt(np.maximum(eigvals, 1e-20))) @ eigvecs.T
+
+        steps = rng.standard_normal((lam, dim)) @ sqrt_cov.T
+        points = np.clip(mean + sigma * steps, 0, 1)
+        scores = np.array(f(points))
+        evals += lam
+        generation += 1
+
+        order = np.argsort(scores)
+        if scores[order[0]] < best_score:
+            best, best_score = points[order[0]], scores[order[0]]
+
+        old_mean = mean
+        mean = weights @ points[order[:mu]]
+        y = (mean - old_mean) / sigma
+        p_sigma = (1 - c_sigma) * p_sigma + math.sqrt(c_sigma * (2 - c_sigma) * mu_eff) * inv_sqrt_cov @ y
+        h_sigma = (np.linalg.norm(p_sigma) / math.sqrt(1 - (1 - c_sigma) ** (2 * generation)) / chi_n
+                   < 1.4 + 2 / (dim + 1))
+        p_c = (1 - c_c) * p_c + h_sigma * math.sqrt(c_c * (2 - c_c) * mu_eff) * y
+        y_k = (points[order[:mu]] - old_mean) / sigma
+        cov = ((1 - c_1 - c_mu) * cov
+               + c_1 * (np.outer(p_c, p_c) + (1 - h_sigma) * c_c * (2 - c_c) * cov)
+               + c_mu * (weights[:, None] * y_k).T @ y_k)
+        sigma *= math.exp((c_sigma / d_sigma) * (np.linalg.norm(p_sigma) / chi_n - 1))
+
+    return list(best)
+
+
+# ------------------ Auto-Tune ------------------
+def auto_tune(strategy, scenarios, bounds, target_path="sinusoidal", fixed=None, method=None, max_evals=40,
+              duration=60, seed=0, **sweep_kwargs):
+    # bounds maps each tuned gain to (low, high), e.g. {"Kp": (0.5, 100)} or {"Kp": (1, 20), "Kd": (0, 20)}.
+    # method: "golden" (1 gain), "nelder_mead" (2-3 gains) or "cmaes"; picked from len(bounds) by default.
+    names = list(bounds)
+    if method is None:
+        method = "golden" if len(names) == 1 else "nelder_mead" if len(names) <= 3 else "cmaes"
+    if method not in ("golden", "nelder_mead", "cmaes"):
+        raise ValueError(f"Unknown tuning method: {method}")
+    if method == "golden" and len(names) != 1:
+        raise ValueError("Golden-section search tunes exactly one gain")
+
+    low = np.array([bounds[n][0] for n in names], dtype=float)
+    high = np.array([bounds[n][1] for n in names], dtype=float)
+
+    def to_params(unit_point):
+        return low + np.asarray(unit_point) * (high - low)
+
+    # One worker pool for the whole search, shared by every objective evaluation
+    with worker_pool(sweep_kwargs.pop("executor", None), sweep_kwargs.get("max_workers")) as executor:
+        objective = CaptureTimeObjective(strategy, scenarios, names, target_path=target_path, fixed=fixed,
+                                         duration=duration, executor=executor, **sweep_kwargs)
+
+        def f(unit_points):
+            return objective([to_params(p) for p in unit_points])
+
+        if method == "golden":
+            best = golden_section(f, max_evals=max_evals)
+        elif method == "nelder_mead":
+            best = nelder_mead(f, len(names), max_evals=max_evals)
+        else:
+            best = cma_es(f, len(names), max_evals=max_evals, seed=seed)
+
+        best_params = to_params(best)
+        score, = objective([best_params])
+    return {
+        "strategy": strategy,
+        "target_path": target_path,
+        "method": method,
+        "best": dict(zip(names, best_params.tolist())),
+        "mean_time_to_capture": score,
+        "evaluations": objective.evaluations,
+        "history": objective.history,
+    }
@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# ------------------ Import Budget ------------------
+# Headless workers should only pay for numpy: importing robo_pursuit took ~0.8 s with pygame and
+# matplotlib loaded eagerly, and ~0.13 s without them.
+HEADLESS_IMPORT_BUDGET_S = 0.3
+HEAVY_MODULES = ("pygame", "matplotlib")
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import robo_pursuit, sweep
+elapsed = time.perf_counter() - start
+loaded = sorted({m.split('.')[0] for m in sys.modules} & set(sys.argv[1:]))
+print(json.dumps({"seconds": elapsed, "heavy_modules": loaded}))
+"""
+
+
+def measure_headless_import(repeats=3):
+    # Best of `repeats` cold imports, each in a fresh interpreter
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, "-c", _IMPORT_PROBE, *HEAVY_MODULES], cwd=HERE,
+                             capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout))
+    return min(runs, key=lambda r: r["seconds"])
+
+
+def check_import_budget(budget=HEADLESS_IMPORT_BUDGET_S):
+    result = measure_headless_import()
+    result["budget"] = budget
+    result["ok"] = result["seconds"] <= budget and not result["heavy_modules"]
+    return result
+
+
+# ------------------ Simulator Benchmarks ------------------
+# Every case reports simulated steps per second and runs per second. Baselines are kept in
+# benchmark_baseline.json; a case is a regression when either rate drops by more than the threshold.
+STRATEGIES = ("simple", "constant_bearing", "proportional_navigation", "parallel_navigation", "motion_camouflage")
+BASELINE_FILE = os.path.join(HERE, "benchmark_baseline.json")
+REGRESSION_THRESHOLD = 0.2
+GAINS = {"Kp": 15, "Ki": 0, "Kd": 10, "theta_CB": 20}
+
+
+def bench_scenarios(n, seed=0):
+    from sweep import random_scenario
+    rng = random.Random(seed)
+    return [random_scenario(rng) for _ in range(n)]
+
+
+def _timed(fn, repeats, min_time=0.1):
+    # Warm up once (track cache, imports), then loop fn until each sample takes at least min_time;
+    # returns the best per-call time and the results of one call
+    results = fn()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 2
+    best = elapsed / loops
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best, results
+
+
+def _rates(seconds, results):
+    return {"steps_per_s": sum(r["steps"] for r in results) / seconds, "runs_per_s": len(results) / seconds}
+
+
+def bench_single(strategy, scenarios, frame_delay=0, angle_noise_std=0, duration=20, repeats=3):
+    from robo_pursuit import run_single_simulation
+    def run():
+        return [run_single_simulation(strategy, agent_start=a, target_start=t, duration=duration,
+                                      frame_delay=frame_delay, agent_kwargs={"angle_noise_std": angle_noise_std},
+                                      verbose=False, record_every=0, **GAINS)
+                for a, t in scenarios]
+    return _rates(*_timed(run, repeats))
+
+
+def bench_vectorized(strategy, scenarios, frame_delay=0, angle_noise_std=0, duration=20, repeats=3):
+    from robo_pursuit import run_vectorized_simulations
+    def run():
+        return run_vectorized_simulations(strategy, scenarios, frame_delay=frame_delay, duration=duration,
+                                          angle_noise_std=angle_noise_std, **GAINS)
+    return _rates(*_timed(run, repeats))
+
+
+def bench_sweep(scenarios, max_workers, vectorized=False, duration=20, repeats=3):
+    from sweep import make_sweep_grid, run_sweep
+    jobs = make_sweep_grid(STRATEGIES, [5, 15], [0], [10], [20], [0, 20], ["linear"], scenarios)
+    def run():
+        return run_sweep(jobs, duration=duration, max_workers=max_workers, vectorized=vectorized)
+    return _rates(*_timed(run, repeats))
+
+
+def run_suite(quick=False):
+    scenarios = bench_scenarios(4 if quick else 8)
+    repeats = 1 if quick else 3
+    cases = {}
+    for strategy in STRATEGIES:
+        for frame_delay, noise in [(0, 0), (20, 0), (0, 5)]:
+            tag = f"delay{frame_delay}_noise{noise}"
+            cases[f"single/{strategy}/{tag}"] = bench_single(strategy, scenarios, frame_delay, noise, repeats=repeats)
+            cases[f"vectorized/{strategy}/{tag}"] = bench_vectorized(strategy, scenarios, frame_delay, noise,
+                                                                     repeats=repeats)
+
+    for batch_size in ([16, 128] if quick else [16, 128, 1024]):
+        cases[f"vectorized_batch/simple/{batch_size}"] = bench_vectorized("simple", bench_scenarios(batch_size, seed=1),
+                                                                           repeats=repeats)
+
+    cpus = os.cpu_count() or 1
+    for workers in sorted({w for w in (1, 2, 4, 8, 16, 32) if w <= cpus} | {cpus}):
+        if quick and workers not in (1, cpus):
+            continue
+        cases[f"sweep/workers{workers}"] = bench_sweep(scenarios, workers, repeats=repeats)
+    return cases
+
+
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD):
+    # Cases whose steps/s or runs/s fell more than `threshold` below the baseline
+    regressions = []
+    for name, rates in current.items():
+        if name not in baseline:
+            continue
+        for metric, value in rates.items():
+            reference = baseline[name].get(metric)
+            if reference and value < reference * (1 - threshold):
+                regressions.append((name, metric, reference, value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pursuit simulator")
+    parser.add_argument("--quick", action="store_true", help="fewer scenarios, repeats and worker counts")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="relative slowdown that counts as a regression")
+    args = parser.parse_args(argv)
+
+    report = check_import_budget()
+    print(f"Headless import: {report['seconds'] * 1000:.0f} ms (budget {report['budget'] * 1000:.0f} ms) | "
+          f"heavy modules loaded: {report['heavy_modules'] or 'none'} | {'OK' if report['ok'] else 'OVER BUDGET'}")
+
+    cases = run_suite(quick=args.quick)
+    for name, rates in cases.items():
+        print(f"{name:<55} {rates['steps_per_s']:>14,.0f} steps/s {rates['runs_per_s']:>10,.1f} runs/s")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"python": sys.version.split()[0], "cpus": os.cpu_count(), "cases": cases}, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0 if report["ok"] else 1
+
+    regressions = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(cases, json.load(f)["cases"], args.threshold)
+        for name, metric, reference, value in regressions:
+            print(f"REGRESSION {name} {metric}: {value:,.1f} vs baseline {reference:,.1f}")
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%} against {args.baseline}")
+    else:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+    return 0 if report["ok"] and not regressions else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import argparse
+import sys
+
+from robo_pursuit import FPS, HEIGHT, WIDTH, DisplaySession, read_trajectory_log, wrap_angle
+
+# ------------------ Replay Viewer ------------------
+# Plays a trajectory log written by run_single_simulation(log_file=...) straight from the
+# memory-mapped frames, without re-running the physics. Playback uses the DisplaySession keys
+# (SPACE pause, RIGHT single frame while paused, UP / DOWN speed x1-x64), plus:
+#   LEFT            one frame back while paused, 1 s back while playing (RIGHT: 1 s forward)
+#   PAGE UP / DOWN  10 s back / forward
+#   HOME / END      first / last frame
+#   0-9             seek to 0%, 10%, ... 90%
+#   mouse           click or drag on the progress bar to scrub
+BAR_RECT = (20, HEIGHT - 30, WIDTH - 40, 10)
+
+
+class ReplayViewer:
+    def __init__(self, filename, display=None):
+        self.header, self.frames = read_trajectory_log(filename)
+        if len(self.frames) == 0:
+            raise ValueError(f"Trajectory log has no frames: {filename}")
+        self.fps = self.header["sim_fps"]
+        self.display = display
+        self.position = 0
+        self._dragging = False
+
+    def seek(self, frame):
+        self.position = min(max(int(frame), 0), len(self.frames) - 1)
+
+    def _scrub(self, mouse_x):
+        x, _, width, _ = BAR_RECT
+        self.seek((mouse_x - x) / width * (len(self.frames) - 1))
+
+    def _on_event(self, event):
+        import pygame
+
+        last = len(self.frames) - 1
+        on_bar = event.type == pygame.MOUSEBUTTONDOWN and pygame.Rect(BAR_RECT).inflate(0, 16).collidepoint(event.pos)
+        if on_bar and event.button == 1:
+            self._dragging = True
+            self._scrub(event.pos[0])
+        elif event.type == pygame.MOUSEMOTION and self._dragging:
+            self._scrub(event.pos[0])
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            self._dragging = False
+        elif event.type != pygame.KEYDOWN:
+            return False
+        elif event.key == pygame.K_LEFT:
+            self.seek(self.position - (1 if self.display.paused else self.fps))
+        elif event.key == pygame.K_RIGHT and not self.display.paused:
+            self.seek(self.position + self.fps)
+        elif event.key == pygame.K_PAGEUP:
+            self.seek(self.position - 10 * self.fps)
+        elif event.key == pygame.K_PAGEDOWN:
+            self.seek(self.position + 10 * self.fps)
+        elif event.key == pygame.K_HOME:
+            self.seek(0)
+        elif event.key == pygame.K_END:
+            self.seek(last)
+        elif pygame.K_0 <= event.key <= pygame.K_9:
+            self.seek((event.key - pygame.K_0) / 10 * last)
+        else:
+            return False
+        return True
+
+    def _render(self, alpha):
+        import pygame
+
+        display = self.display
+        current = self.frames[self.position].astype(float)
+        following = self.frames[min(self.position + 1, len(self.frames) - 1)].astype(float)
+        agent_x, agent_y, heading, target_x, target_y = current + alpha * (following - current)
+        heading = current[2] + alpha * wrap_angle(following[2] - current[2])
+
+        display.erase()
+        drawn = [display.draw_target(target_x, target_y), display.draw_agent(agent_x, agent_y, heading)]
+
+        # Frame k holds the state after step k - 1, as in the live view
+        time_display = f"{self.header['strategy']} | Time: {max(self.position - 1 + alpha, 0) / self.fps:.2f}s"
+        if self.header["time_to_capture"] is not None:
+            time_display += f" | Time to capture = {self.header['time_to_capture']:.2f}s"
+        drawn.append(display.draw_text(time_display + display.status()))
+
+        x, y, width, height = BAR_RECT
+        fraction = self.position / max(len(self.frames) - 1, 1)
+        drawn.append(pygame.draw.rect(display.screen, (200, 200, 200), BAR_RECT))
+        pygame.draw.rect(display.screen, (0, 102, 204), (x, y, round(width * fraction), height))
+        display.present(drawn)
+
+    def play(self, speed=1, render_fps=None):
+        # Runs until the window is closed. Playback pauses on the last frame; SPACE then restarts it.
+        own_display = self.display is None
+        if own_display:
+            self.display = DisplaySession()
+        display = self.display
+        display.speed = speed
+        display.paused = False
+        display.start_playback(self.fps)
+        last = len(self.frames) - 1
+        finished = False
+        while display.open:
+            self._render(display.alpha if self.position < last else 0.0)
+            display.poll(self._on_event)
+            if finished and not display.paused and self.position == last:
+                self.seek(0)
+            self.seek(self.position + display.advance(render_fps or FPS))
+            finished = self.position == last
+            if finished:
+                display.paused = True
+        if own_display:
+            display.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a pursuit trajectory log")
+    parser.add_argument("log_file")
+    parser.add_argument("--speed", type=int, default=1, help="initial playback speed (1-64)")
+    parser.add_argument("--seek", type=float, default=0, help="start time in seconds")
+    args = parser.parse_args(argv)
+
+    viewer = ReplayViewer(args.log_file)
+    viewer.seek(args.seek * viewer.fps)
+    viewer.play(speed=args.speed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
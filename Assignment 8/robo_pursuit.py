@@ -1,22 +1,81 @@
-import pygame
-import pygame.gfxdraw
 import math
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
 import numpy as np
 import csv
+import json
 import random
-from collections import deque, defaultdict
+import struct
+import time
+from collections import defaultdict, OrderedDict, namedtuple
 from itertools import product
 
 # ------------------ Constants ------------------
+# pygame and matplotlib are imported only inside the drawing and plotting functions, so headless
+# runs and sweep workers never load them (see benchmark.py for the import-time budget)
 WIDTH, HEIGHT = 800, 600
-FPS = 60
+FPS = 60  # default simulation and render rate; runs can override both
+INTEGRATORS = ("euler", "semi_implicit", "rk4")
+SIM_VERSION = "2"  # bump whenever a change alters simulation results, to invalidate cached sweeps
 SHOW_VISUAL = True  # Set to False for silent simulation
 
+# ------------------ Trajectory Recorder ------------------
+class TrajectoryRecorder:
+    # Growable (n, 2) NumPy buffer of (x, y) points. Keeps every `every`-th point; every=0 turns it off.
+    def __init__(self, every=1, dtype=np.float64, capacity=256):
+        self.every = every
+        self._buf = np.empty((capacity if every else 0, 2), dtype=dtype)
+        self._n = 0
+        self._count = 0  # points offered, recorded or not
+
+    def append(self, x, y):
+        if self.every and self._count % self.every == 0:
+            if self._n == len(self._buf):
+                self._grow(self._n + 1)
+            self._buf[self._n, 0] = x
+            self._buf[self._n, 1] = y
+            self._n += 1
+        self._count += 1
+
+    def extend(self, xs, ys):
+        xs, ys = np.asarray(xs), np.asarray(ys)
+        if self.every:
+            keep = slice((-self._count) % self.every, None, self.every)
+            xs_kept, ys_kept = xs[keep], ys[keep]
+            if self._n + len(xs_kept) > len(self._buf):
+                self._grow(self._n + len(xs_kept))
+            self._buf[self._n:self._n + len(xs_kept), 0] = xs_kept
+            self._buf[self._n:self._n + len(xs_kept), 1] = ys_kept
+            self._n += len(xs_kept)
+        self._count += len(xs)
+
+    def finish(self, x, y):
+        # Keep the final point even when decimation skipped it
+        if self.every and self._count and (self._count - 1) % self.every:
+            if self._n == len(self._buf):
+                self._grow(self._n + 1)
+            self._buf[self._n] = (x, y)
+            self._n += 1
+
+    def _grow(self, needed):
+        buf = np.empty((max(needed, 2 * len(self._buf)), 2), dtype=self._buf.dtype)
+        buf[:self._n] = self._buf[:self._n]
+        self._buf = buf
+
+    def array(self):
+        return self._buf[:self._n]
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, index):
+        return self.array()[index]
+
+    def __iter__(self):
+        return iter(self.array())
+
+
 # ------------------ Target Class ------------------
 class Target:
-    def __init__(self, x, y, speed, wave_amplitude=0, wave_length=1, mode='sinusoidal'):
+    def __init__(self, x, y, speed, wave_amplitude=0, wave_length=1, mode='sinusoidal', record_every=1, fps=None):
         self.x = x
         self.y = y
         self.init_y = y
@@ -25,14 +84,15 @@ class Target:
         self.wavelength = wave_length
         self.direction = 1
         self.mode = mode
-        self.trajectory = []
+        self.fps = fps or FPS  # simulation steps per second
+        self.trajectory = TrajectoryRecorder(every=record_every)
         self.captured = False
 
     def update(self, t):
         if self.captured:
             return
 
-        self.x += self.direction * self.speed / FPS
+        self.x += self.direction * self.speed / self.fps
         # self.y += self.direction * self.speed[1] / FPS
 
         if self.mode == 'sinusoidal':
@@ -43,7 +103,431 @@ class Target:
         if self.x > WIDTH - 20 or self.x < 20:
             self.direction *= -1
 
-        self.trajectory.append((self.x, self.y))
+        self.trajectory.append(self.x, self.y)
+
+    def track(self, steps):
+        # Positions the next `steps` calls to update() would produce, without changing this target
+        return target_track(self.x, self.init_y, self.speed, self.amp, self.wavelength, self.mode,
+                            steps=steps, direction=self.direction, fps=self.fps)
+
+
+def target_track(x, y, speed, wave_amplitude=0, wave_length=1, mode='sinusoidal', steps=1, direction=1, fps=None):
+    # Vectorized equivalent of calling Target.update `steps` times: x is a triangle wave, so it is
+    # built one wall-to-wall segment at a time. Each segment is a sequential cumsum, which rounds
+    # exactly like the repeated += in Target.update.
+    fps = fps or FPS
+    xs = np.empty(steps)
+    k = 0
+    while k < steps:
+        inc = direction * speed / fps
+        if 20 <= x <= WIDTH - 20 and inc != 0:
+            wall = WIDTH - 20 if inc > 0 else 20
+            window = int(abs(wall - x) / abs(inc)) + 2
+        elif inc == 0:
+            window = steps - k
+        else:
+            window = 1  # outside the walls the direction flips every frame
+        window = min(window, steps - k)
+
+        seg = np.cumsum(np.concatenate(([x], np.full(window, inc))))[1:]
+        out = (seg > WIDTH - 20) | (seg < 20)
+        bounced = out.any()
+        taken = int(np.argmax(out)) + 1 if bounced else window
+
+        xs[k:k + taken] = seg[:taken]
+        x = seg[taken - 1]
+        k += taken
+        if bounced:
+            direction = -direction
+
+    if mode == 'sinusoidal':
+        ys = y + wave_amplitude * np.sin(2 * math.pi * xs / wave_length)
+    else:
+        ys = np.full(steps, float(y))
+    return xs, ys
+
+
+class TrackCache:
+    # LRU cache of read-only target tracks. A track does not depend on the agent, so every
+    # run of a sweep that shares a scenario reuses the same array.
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._tracks = OrderedDict()
+
+    def get(self, target_start, speed, wave_amplitude, wave_length, mode, duration, fps=None):
+        fps = fps or FPS
+        key = (tuple(target_start), speed, wave_amplitude, wave_length, mode, duration, fps)
+        track = self._tracks.get(key)
+        if track is not None:
+            self._tracks.move_to_end(key)
+            self.hits += 1
+            return track
+
+        self.misses += 1
+        track = np.stack(target_track(*target_start, speed, wave_amplitude, wave_length, mode,
+                                      steps=int(duration * fps), fps=fps))
+        track.flags.writeable = False
+        self._tracks[key] = track
+        self.nbytes += track.nbytes
+        while self.nbytes > self.max_bytes and len(self._tracks) > 1:
+            _, evicted = self._tracks.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+        return track
+
+    def clear(self):
+        self._tracks.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+
+TRACK_CACHE = TrackCache()
+
+
+# ------------------ Line-of-Sight Noise ------------------
+# Noise comes from a per-run numpy Generator, drawn in blocks of (block, 2) rather than one
+# scalar per call. Update k of a run always uses pair k of its stream, so runs that share a
+# seed see the same noise whatever the strategy or gains (paired comparisons). Block sizes only
+# change how many pairs are drawn at once, never the stream itself; the run functions cap them at
+# the run's step count, and batches also at NOISE_BATCH_PAIRS pairs over all rows.
+
+NOISE_BLOCK = 4096
+NOISE_BATCH_PAIRS = 1 << 20  # 16 MB of float64 pairs
+
+
+def default_noise_seed():
+    # Drawn from the legacy global RNG, so np.random.seed (e.g. sweep.seed_job) still makes runs repeatable
+    return int(np.random.randint(2**63, dtype=np.int64))
+
+
+class NoiseStream:
+    def __init__(self, std, seed=None, block=NOISE_BLOCK):
+        self.std = std
+        self.block = block
+        self.seed = default_noise_seed() if seed is None else seed
+        self._rng = np.random.default_rng(self.seed)
+        self._buf = []
+        self._i = 0
+
+    def next(self):
+        if self._i == len(self._buf):
+            self._buf = self._rng.normal(0, self.std, size=(self.block, 2)).tolist()
+            self._i = 0
+        pair = self._buf[self._i]
+        self._i += 1
+        return pair
+
+
+class NoiseStreamBatch:
+    # One stream per row, identical to NoiseStream for the same (std, seed)
+    def __init__(self, std, seeds, block=NOISE_BLOCK):
+        self.std = std
+        self.block = max(1, min(block, NOISE_BATCH_PAIRS // len(seeds)))
+        self.seeds = seeds
+        self._rngs = [np.random.default_rng(seed) for seed in seeds]
+        self._buf = None
+        self._i = self.block
+
+    def next(self):
+        if self._i == self.block:
+            self._buf = np.stack([rng.normal(0, std, size=(self.block, 2)) if std > 0 else np.zeros((self.block, 2))
+                                  for rng, std in zip(self._rngs, self.std)], axis=1)
+            self._i = 0
+        pair = self._buf[self._i]
+        self._i += 1
+        return pair[:, 0], pair[:, 1]
+
+
+# ------------------ Strategy Registry ------------------
+# Each strategy is a pair of kernels resolved once when an Agent/AgentBatch is built:
+#   step(agent, theta_r, target_x, target_y, dt)             scalar Agent, updates agent.heading in place
+#   step_batch(agent, theta_r, target_x, target_y, dt, active)  AgentBatch, returns the new heading array
+# `noisy` strategies get angle_noise_std added to the line of sight before theta_r is computed.
+
+Strategy = namedtuple("Strategy", ["step", "step_batch", "noisy"])
+STRATEGIES = {}
+
+
+def register_strategy(name, step, step_batch, noisy=True):
+    STRATEGIES[name] = Strategy(step, step_batch, noisy)
+
+
+def get_strategy(name):
+    try:
+        return STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown strategy: {name}") from None
+
+
+def wrap_angle(angle):
+    return (angle + math.pi) % (2 * math.pi) - math.pi
+
+
+def _simple_step(agent, theta_r, target_x, target_y, dt):
+    error = wrap_angle(theta_r - agent.heading)
+    agent.heading += (agent.Kp * error + agent.Ki * agent.integral_error) * dt
+
+
+def _simple_step_batch(agent, theta_r, target_x, target_y, dt, active):
+    error = wrap_angle(theta_r - agent.heading)
+    return agent.heading + (agent.Kp * error + agent.Ki * agent.integral_error) * dt
+
+
+def _constant_bearing_step(agent, theta_r, target_x, target_y, dt):
+    error = wrap_angle(theta_r - agent.heading - agent.theta_set)
+    agent.integral_error += error * dt
+    agent.heading += (agent.Kp * error + agent.Ki * agent.integral_error) * dt
+
+
+def _constant_bearing_step_batch(agent, theta_r, target_x, target_y, dt, active):
+    error = wrap_angle(theta_r - agent.heading - agent.theta_set)
+    agent.integral_error = np.where(active, agent.integral_error + error * dt, agent.integral_error)
+    return agent.heading + (agent.Kp * error + agent.Ki * agent.integral_error) * dt
+
+
+def _proportional_navigation_step(agent, theta_r, target_x, target_y, dt):
+    if agent.last_theta_r is not None:
+        d_theta_r = wrap_angle((theta_r - agent.last_theta_r) / dt)
+        agent.heading += agent.Kd * d_theta_r * dt  # Kd is the navigation constant
+    agent.last_theta_r = theta_r
+
+
+def _proportional_navigation_step_batch(agent, theta_r, target_x, target_y, dt, active):
+    has_last = ~np.isnan(agent.last_theta_r)
+    d_theta_r = wrap_angle((theta_r - agent.last_theta_r) / dt)
+    heading = np.where(has_last, agent.heading + agent.Kd * d_theta_r * dt, agent.heading)
+    agent.last_theta_r = np.where(active, theta_r, agent.last_theta_r)
+    return heading
+
+
+def _parallel_navigation_step(agent, theta_r, target_x, target_y, dt):
+    _proportional_navigation_step(agent, theta_r, target_x, target_y, dt)
+    agent.theta_r_log.append(theta_r)
+
+
+def _parallel_navigation_step_batch(agent, theta_r, target_x, target_y, dt, active):
+    if agent.theta_r_log is not None:
+        agent.theta_r_log.append(theta_r)
+    return _proportional_navigation_step_batch(agent, theta_r, target_x, target_y, dt, active)
+
+
+def _motion_camouflage_step(agent, theta_r, target_x, target_y, dt):
+    # Line between camouflage point and target
+    x_c, y_c = agent.camouflage_point
+    x_t, y_t = target_x, target_y
+
+    # Compute lambda along the line (projection scalar)
+    dx = x_t - x_c
+    dy = y_t - y_c
+    if dx == 0 and dy == 0:
+        desired_x, desired_y = x_t, y_t
+    else:
+        # Find lambda such that agent lies on the line between target and camo point
+        vec_ct = np.array([dx, dy])
+        vec_ca = np.array([agent.x - x_c, agent.y - y_c])
+        lambda_proj = np.dot(vec_ct, vec_ca) / (np.dot(vec_ct, vec_ct))
+
+        # Clamp lambda between 0 and 1 (stay between camo and target)
+        lambda_proj = max(0.0, min(1.0, lambda_proj))
+
+        # Desired point on that line
+        desired_x = x_c + lambda_proj * dx
+        desired_y = y_c + lambda_proj * dy
+
+    # Steer towards the desired point
+    theta_goal = math.atan2(desired_y - agent.y, desired_x - agent.x)
+    error = wrap_angle(theta_goal - agent.heading)
+    agent.heading += (agent.Kp * error + agent.Ki * agent.integral_error) * dt
+
+
+def _motion_camouflage_step_batch(agent, theta_r, target_x, target_y, dt, active):
+    dx = target_x - agent.camo_x
+    dy = target_y - agent.camo_y
+    norm = dx * dx + dy * dy
+    degenerate = norm == 0
+    lambda_proj = (dx * (agent.x - agent.camo_x) + dy * (agent.y - agent.camo_y)) / np.where(degenerate, 1, norm)
+    lambda_proj = np.clip(lambda_proj, 0.0, 1.0)
+    desired_x = np.where(degenerate, target_x, agent.camo_x + lambda_proj * dx)
+    desired_y = np.where(degenerate, target_y, agent.camo_y + lambda_proj * dy)
+
+    theta_goal = np.arctan2(desired_y - agent.y, desired_x - agent.x)
+    error = wrap_angle(theta_goal - agent.heading)
+    return agent.heading + (agent.Kp * error + agent.Ki * agent.integral_error) * dt
+
+
+register_strategy("simple", _simple_step, _simple_step_batch)
+register_strategy("constant_bearing", _constant_bearing_step, _constant_bearing_step_batch)
+register_strategy("proportional_navigation", _proportional_navigation_step, _proportional_navigation_step_batch)
+register_strategy("parallel_navigation", _parallel_navigation_step, _parallel_navigation_step_batch)
+register_strategy("motion_camouflage", _motion_camouflage_step, _motion_camouflage_step_batch, noisy=False)
+
+
+# ------------------ Agent Sprites ------------------
+# The agent body is drawn and rotated once per quantized heading instead of on every frame;
+# Agent.draw only blits the nearest pre-rendered sprite.
+
+class SpriteCache:
+    def __init__(self, steps=360, colour=(255, 215, 0), scale=1.0):
+        self.steps = steps
+        self.colour = colour
+        self.scale = scale
+        self._sprites = None
+
+    def _build(self):
+        import pygame
+
+        body_width, body_length = round(24 * self.scale), round(36 * self.scale)  # Larger
+        body = pygame.Surface((body_length, body_width), pygame.SRCALPHA)
+        body.fill(self.colour)  # Yellow body by default
+        pygame.draw.rect(body, (0, 102, 204), (0, 0, body_length, max(1, round(6 * self.scale))))  # Blue sensor strip
+        pygame.draw.circle(body, (255, 255, 255), (body_length - max(1, round(4 * self.scale)), body_width // 2),
+                           max(1, round(3 * self.scale)))  # White camera
+        self._sprites = [pygame.transform.rotate(body, -360 * k / self.steps) for k in range(self.steps)]
+
+    def get(self, heading):
+        if self._sprites is None:
+            self._build()
+        return self._sprites[round(heading / (2 * math.pi) * self.steps) % self.steps]
+
+
+AGENT_SPRITES = SpriteCache()
+_SPRITE_CACHES = {((255, 215, 0), 1.0): AGENT_SPRITES}
+
+
+def agent_sprites(colour=(255, 215, 0), scale=1.0):
+    # Shared cache per body colour and scale, e.g. for overlaid or tiled batch views
+    key = (tuple(colour), float(scale))
+    if key not in _SPRITE_CACHES:
+        _SPRITE_CACHES[key] = SpriteCache(colour=colour, scale=scale)
+    return _SPRITE_CACHES[key]
+
+
+# ------------------ Display Session ------------------
+# One pygame window reused by every run of a visual batch. Each frame repaints only the rects drawn
+# in the previous frame and pushes old and new rects with display.update (dirty rects). A view
+# (x offset, y offset, scale) maps world coordinates into a tile of the window.
+# Playback is fixed-step: physics advances sim_fps steps per second of wall-clock time times the
+# playback speed, independent of the render rate, and frames interpolate between the last two
+# steps. Keys: SPACE pause, RIGHT single step while paused, UP / DOWN double / halve the speed (x1-x64).
+SCENARIO_COLOURS = [(230, 25, 75), (60, 180, 75), (0, 130, 200), (245, 130, 48), (145, 30, 180),
+                    (70, 200, 200), (240, 50, 230), (128, 128, 0), (0, 128, 128), (170, 110, 40)]
+FULL_VIEW = (0, 0, 1.0)
+
+
+class DisplaySession:
+    def __init__(self, size=(WIDTH, HEIGHT), offscreen=False):
+        import pygame
+        pygame.init()
+        self.size = size
+        self.offscreen = offscreen  # draw into a plain Surface and never touch the display (video export)
+        self.screen = pygame.Surface(size) if offscreen else pygame.display.set_mode(size)
+        self.font = pygame.font.SysFont("arial", 24)
+        self.clock = pygame.time.Clock()
+        self.open = True  # False once the window has been closed
+        self.speed = 1  # kept across the runs of a batch
+        self.max_speed = 64
+        self.paused = False
+        self.alpha = 0.0  # fraction of a physics step elapsed since the newest state
+        self.sim_fps = FPS
+        self._accumulated = 0.0
+        self._single_steps = 0
+        self.clear()
+
+    def clear(self, views=()):
+        # New background (with tile borders for tiled views), shown in full
+        import pygame
+        self.background = pygame.Surface(self.size)
+        self.background.fill((240, 240, 240))
+        for ox, oy, scale in views:
+            pygame.draw.rect(self.background, (160, 160, 160), (ox, oy, WIDTH * scale, HEIGHT * scale), 1)
+        self.screen.blit(self.background, (0, 0))
+        if not self.offscreen:
+            pygame.display.flip()
+        self._dirty = []
+
+    def tile_views(self, n):
+        cols = math.ceil(math.sqrt(n))
+        rows = math.ceil(n / cols)
+        scale = min(self.size[0] / (cols * WIDTH), self.size[1] / (rows * HEIGHT))
+        return [((i % cols) * WIDTH * scale, (i // cols) * HEIGHT * scale, scale) for i in range(n)]
+
+    def poll(self, on_event=None):
+        # on_event(event) sees every event first and returns True to skip the default handling
+        import pygame
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.open = False
+            elif on_event is not None and on_event(event):
+                continue
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    self.paused = not self.paused
+                elif event.key in (pygame.K_RIGHT, pygame.K_PERIOD) and self.paused:
+                    self._single_steps += 1
+                elif event.key in (pygame.K_UP, pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    self.speed = min(self.max_speed, self.speed * 2)
+                elif event.key in (pygame.K_DOWN, pygame.K_MINUS, pygame.K_KP_MINUS):
+                    self.speed = max(1, self.speed // 2)
+        return self.open
+
+    def start_playback(self, sim_fps):
+        self.sim_fps = sim_fps
+        self.alpha = 0.0
+        self._accumulated = 0.0
+        self._single_steps = 0
+        self.clock.tick()  # restart the frame timer
+
+    def advance(self, render_fps):
+        # Waits for the next frame and returns how many physics steps are due by then.
+        # A stall (e.g. dragging the window) is not caught up afterwards.
+        wall = min(self.clock.tick(render_fps) / 1000, 0.1)
+        if self.paused:
+            due, self._single_steps = self._single_steps, 0
+            return due
+        self._accumulated += wall * self.speed * self.sim_fps
+        due = int(self._accumulated)
+        self._accumulated -= due
+        self.alpha = self._accumulated
+        return due
+
+    def status(self):
+        return f" | x{self.speed}" + (" | paused" if self.paused else "")
+
+    def erase(self):
+        for rect in self._dirty:
+            self.screen.blit(self.background, rect, rect)
+
+    def draw_target(self, x, y, colour=(200, 0, 0), view=FULL_VIEW):
+        import pygame
+        ox, oy, scale = view
+        return pygame.draw.circle(self.screen, colour, (int(ox + x * scale), int(oy + y * scale)),
+                                  max(2, round(12 * scale)))
+
+    def draw_agent(self, x, y, heading, sprites=AGENT_SPRITES, view=FULL_VIEW):
+        ox, oy, scale = view
+        sprite = sprites.get(heading)
+        return self.screen.blit(sprite, sprite.get_rect(center=(ox + x * scale, oy + y * scale)))
+
+    def draw_text(self, text, pos=(20, 20)):
+        return self.screen.blit(self.font.render(text, True, (0, 0, 0)), pos)
+
+    def present(self, drawn):
+        import pygame
+        if not self.offscreen:
+            pygame.display.update(self._dirty + drawn)
+        self._dirty = drawn
+
+    def hold(self, ms):
+        import pygame
+        pygame.time.wait(ms)
+
+    def close(self):
+        import pygame
+        self.open = False
+        pygame.quit()
 
 
 # ------------------ Agent Class ------------------
@@ -55,196 +539,473 @@ class Agent:
         self.heading = 0
         self.speed = speed
         self.strategy = strategy
+        self._kernel = get_strategy(strategy)  # resolved once, see Strategy Registry
         self.theta_set = math.radians(theta_set_deg)  # for constant bearing
         self.Kp = Kp
         self.Ki = Ki
         self.Kd = Kd 
         self.integral_error = 0 # 
-        self.trajectory = []
+        self.trajectory = TrajectoryRecorder(every=kwargs.get("record_every", 1))
         self.captured = False
         self.camouflage_point = camouflage_point
         self.last_theta_r = None  # for derivative calculation
         self.theta_r_log = []  # for logging theta_r over time
         self.angle_noise_std = kwargs.get("angle_noise_std", 0)
+        self.noise = None
+        if self._kernel.noisy and self.angle_noise_std:
+            self.noise = NoiseStream(self.angle_noise_std, seed=kwargs.get("noise_seed"),
+                                     block=kwargs.get("noise_block", NOISE_BLOCK))
+        # Online metrics, so results do not need a stored trajectory
+        self.path_length = 0.0
+        self.heading_change = 0.0
+        self.fps = kwargs.get("fps") or FPS  # simulation steps per second
+        self.integrator = kwargs.get("integrator", "semi_implicit")
+        if self.integrator not in INTEGRATORS:
+            raise ValueError(f"Unknown integrator: {self.integrator}")
 
     def update(self, target_x, target_y):
         if self.captured:
             return
 
+        heading_before = self.heading
         dx = target_x - self.x
         dy = target_y - self.y
 
-        if self.strategy in ["simple", "constant_bearing", "parallel_navigation", "proportional_navigation"]:
-            if hasattr(self, 'angle_noise_std'):
-                dx += np.random.normal(0, self.angle_noise_std)
-                dy += np.random.normal(0, self.angle_noise_std)
+        if self.noise is not None:
+            noise_x, noise_y = self.noise.next()
+            dx += noise_x
+            dy += noise_y
 
         theta_r = math.atan2(dy, dx)
-        dt = 1 / FPS
-
-        if self.strategy == "simple":
-            error = theta_r - self.heading
-            error = (error + math.pi) % (2 * math.pi) - math.pi
-            self.heading += (self.Kp * error + self.Ki * self.integral_error) * dt
-
-        elif self.strategy == "constant_bearing":
-            error = theta_r - self.heading - self.theta_set
-            error = (error + math.pi) % (2 * math.pi) - math.pi
-            self.integral_error += error * dt
-            self.heading += (self.Kp * error + self.Ki * self.integral_error) * dt
-
-        elif self.strategy == "proportional_navigation":
-            if self.last_theta_r is not None:
-                d_theta_r = (theta_r - self.last_theta_r) / dt
-                d_theta_r = (d_theta_r + math.pi) % (2 * math.pi) - math.pi
-                self.heading += self.Kd * d_theta_r * dt # Kd is the navigation constant
-            self.last_theta_r = theta_r
-
-        elif self.strategy == "parallel_navigation":
-            if self.last_theta_r is not None:
-                d_theta_r = (theta_r - self.last_theta_r) / dt
-                d_theta_r = (d_theta_r + math.pi) % (2 * math.pi) - math.pi
-                self.heading += self.Kd * d_theta_r * dt 
-            self.last_theta_r = theta_r
-            self.theta_r_log.append(theta_r)  
-
-        elif self.strategy == "motion_camouflage":
-            # Line between camouflage point and target
-            x_c, y_c = self.camouflage_point
-            x_t, y_t = target_x, target_y
-
-            # Compute lambda along the line (projection scalar)
-            dx = x_t - x_c
-            dy = y_t - y_c
-            if dx == 0 and dy == 0:
-                desired_x, desired_y = x_t, y_t
-            else:
-                # Find lambda such that agent lies on the line between target and camo point
-                vec_ct = np.array([dx, dy])
-                vec_ca = np.array([self.x - x_c, self.y - y_c])
-                lambda_proj = np.dot(vec_ct, vec_ca) / (np.dot(vec_ct, vec_ct))
-
-                # Clamp lambda between 0 and 1 (stay between camo and target)
-                lambda_proj = max(0.0, min(1.0, lambda_proj))
-
-                # Desired point on that line
-                desired_x = x_c + lambda_proj * dx
-                desired_y = y_c + lambda_proj * dy
-
-            # Steer towards the desired point
-            theta_goal = math.atan2(desired_y - self.y, desired_x - self.x)
-            error = theta_goal - self.heading
-            error = (error + math.pi) % (2 * math.pi) - math.pi
-            self.heading += (self.Kp * error + self.Ki * self.integral_error) * dt
+        dt = 1 / self.fps
+        self._kernel.step(self, theta_r, target_x, target_y, dt)
 
         # Update position
-        self.x += self.speed * math.cos(self.heading) * dt
-        self.y += self.speed * math.sin(self.heading) * dt
-        self.trajectory.append((self.x, self.y))
+        if self.integrator == "semi_implicit":
+            self.x += self.speed * math.cos(self.heading) * dt
+            self.y += self.speed * math.sin(self.heading) * dt
+        elif self.integrator == "euler":
+            self.x += self.speed * math.cos(heading_before) * dt
+            self.y += self.speed * math.sin(heading_before) * dt
+        else:
+            # RK4 with the turn rate held over the step (reduces to Simpson's rule on the arc)
+            heading_mid = (heading_before + self.heading) / 2
+            self.x += self.speed * dt * (math.cos(heading_before) + 4 * math.cos(heading_mid) + math.cos(self.heading)) / 6
+            self.y += self.speed * dt * (math.sin(heading_before) + 4 * math.sin(heading_mid) + math.sin(self.heading)) / 6
+        self.trajectory.append(self.x, self.y)
+        self.path_length += self.speed * dt
+        self.heading_change += abs(self.heading - heading_before)
 
     def draw(self, screen):
-        body_width, body_length = 24, 36  # Larger
-        angle_deg = -math.degrees(self.heading)
-        surf = pygame.Surface((body_length, body_width), pygame.SRCALPHA)
-        surf.fill((255, 215, 0))  # Yellow body
-        pygame.draw.rect(surf, (0, 102, 204), (0, 0, body_length, 6))  # Blue sensor strip
-        pygame.draw.circle(surf, (255, 255, 255), (body_length - 4, body_width // 2), 3)  # White camera
+        # Returns the screen rect it covered, for dirty-rect display updates
+        sprite = AGENT_SPRITES.get(self.heading)
+        return screen.blit(sprite, sprite.get_rect(center=(self.x, self.y)))
+
+
+# ------------------ Vectorized Batch Classes ------------------
+# Struct-of-arrays versions of Target and Agent: row i of every array is scenario i,
+# and one call to update() advances every scenario by one frame.
+
+def _as_rows(value, n, dtype=float):
+    return np.broadcast_to(np.asarray(value, dtype=dtype), (n,)).copy()
+
+
+class TargetBatch:
+    def __init__(self, x, y, speed, wave_amplitude=0, wave_length=1, mode='sinusoidal', fps=None):
+        self.x = np.array(x, dtype=float)
+        n = len(self.x)
+        self.y = _as_rows(y, n)
+        self.init_y = self.y.copy()
+        self.speed = _as_rows(speed, n)
+        self.amp = _as_rows(wave_amplitude, n)
+        self.wavelength = _as_rows(wave_length, n)
+        self.direction = np.ones(n)
+        self.sinusoidal = _as_rows(mode, n, dtype=object) == 'sinusoidal'
+        self.fps = fps or FPS
+        self.captured = np.zeros(n, dtype=bool)
+
+    def update(self):
+        active = ~self.captured
+        x = self.x + self.direction * self.speed / self.fps
+        y = np.where(self.sinusoidal, self.init_y + self.amp * np.sin(2 * math.pi * x / self.wavelength), self.init_y)
+        self.x = np.where(active, x, self.x)
+        self.y = np.where(active, y, self.y)
+
+        bounce = active & ((self.x > WIDTH - 20) | (self.x < 20))
+        self.direction[bounce] *= -1
+
+
+class AgentBatch:
+    def __init__(self, x, y, speed, strategy="simple", theta_set_deg=30,
+                 Kp=2.0, Ki=0.5, Kd=4, camouflage_point=None, angle_noise_std=0, log_theta_r=False,
+                 fps=None, integrator="semi_implicit", noise_seed=None, noise_block=NOISE_BLOCK):
+        self.x = np.array(x, dtype=float)
+        n = len(self.x)
+        self.y = _as_rows(y, n)
+        self.heading = np.zeros(n)
+        self.speed = _as_rows(speed, n)
+        self.strategy = strategy
+        self._kernel = get_strategy(strategy)
+        self.theta_set = np.radians(_as_rows(theta_set_deg, n))
+        self.Kp = _as_rows(Kp, n)
+        self.Ki = _as_rows(Ki, n)
+        self.Kd = _as_rows(Kd, n)
+        self.integral_error = np.zeros(n)
+        self.last_theta_r = np.full(n, np.nan)  # NaN plays the role of None in Agent
+        self.captured = np.zeros(n, dtype=bool)
+        if camouflage_point is None:
+            camouflage_point = (self.x, self.y)
+        self.camo_x = _as_rows(camouflage_point[0], n)
+        self.camo_y = _as_rows(camouflage_point[1], n)
+        self.angle_noise_std = _as_rows(angle_noise_std, n)
+        self.noise = None
+        if self._kernel.noisy and self.angle_noise_std.any():
+            # One seed per row; a single seed gives every row the same (paired) stream
+            if noise_seed is None:
+                noise_seed = [default_noise_seed() for _ in range(n)]
+            elif np.isscalar(noise_seed):
+                noise_seed = [noise_seed] * n
+            self.noise = NoiseStreamBatch(self.angle_noise_std, list(noise_seed), block=noise_block)
+        self.steps = np.zeros(n, dtype=int)  # number of updates each row received before capture
+        self.path_length = np.zeros(n)
+        self.heading_change = np.zeros(n)
+        self.theta_r_log = [] if log_theta_r and strategy == "parallel_navigation" else None
+        self.fps = fps or FPS
+        if integrator not in INTEGRATORS:
+            raise ValueError(f"Unknown integrator: {integrator}")
+        self.integrator = integrator
 
-        rotated = pygame.transform.rotate(surf, angle_deg)
-        rect = rotated.get_rect(center=(self.x, self.y))
-        screen.blit(rotated, rect)
+    def update(self, target_x, target_y):
+        active = ~self.captured
+        dt = 1 / self.fps
+
+        dx = target_x - self.x
+        dy = target_y - self.y
+        if self.noise is not None:
+            noise_x, noise_y = self.noise.next()
+            dx = dx + noise_x
+            dy = dy + noise_y
+
+        theta_r = np.arctan2(dy, dx)
+        heading = self._kernel.step_batch(self, theta_r, target_x, target_y, dt, active)
+
+        self.heading_change += np.where(active, np.abs(heading - self.heading), 0)
+        heading_before = self.heading
+        self.heading = np.where(active, heading, self.heading)
+        if self.integrator == "semi_implicit":
+            step_x = self.speed * np.cos(self.heading) * dt
+            step_y = self.speed * np.sin(self.heading) * dt
+        elif self.integrator == "euler":
+            step_x = self.speed * np.cos(heading_before) * dt
+            step_y = self.speed * np.sin(heading_before) * dt
+        else:
+            heading_mid = (heading_before + self.heading) / 2
+            step_x = self.speed * dt * (np.cos(heading_before) + 4 * np.cos(heading_mid) + np.cos(self.heading)) / 6
+            step_y = self.speed * dt * (np.sin(heading_before) + 4 * np.sin(heading_mid) + np.sin(self.heading)) / 6
+        self.x = np.where(active, self.x + step_x, self.x)
+        self.y = np.where(active, self.y + step_y, self.y)
+        self.path_length += np.where(active, self.speed * dt, 0)
+        self.steps += active
+
+
+# ------------------ Sensing Delay ------------------
+# At step t the agent sees the target position from step t - delay, or the current one until
+# `delay` positions exist.
+
+class DelayLine:
+    # Fixed (depth, n) ring buffer of target positions for n scenarios with per-row delays.
+    # read() serves every row with a single fancy-index operation.
+    def __init__(self, delays):
+        self.delays = np.atleast_1d(np.asarray(delays, dtype=int))
+        self.depth = int(self.delays.max()) + 1
+        n = len(self.delays)
+        self._x = np.empty((self.depth, n))
+        self._y = np.empty((self.depth, n))
+        self._rows = np.arange(n)
+        self._t = -1  # step of the newest pushed position
+
+    def push(self, x, y):
+        self._t += 1
+        self._x[self._t % self.depth] = x
+        self._y[self._t % self.depth] = y
+
+    def read(self):
+        slot = np.where(self._t >= self.delays, self._t - self.delays, self._t) % self.depth
+        return self._x[slot, self._rows], self._y[slot, self._rows]
+
+
+# ------------------ Capture Detection ------------------
+# Continuous-time capture: the relative position (target - agent) is taken to move in a straight
+# line from p0 to p1 over one step, and the first s in [0, 1] with |p| = radius is solved for.
+# Step t spans simulated time t*dt to (t+1)*dt, so capture happens at (t + s) * dt.
+# Coarse steps can then no longer tunnel through the capture disc.
+
+def swept_capture(x0, y0, x1, y1, radius):
+    if x0 * x0 + y0 * y0 < radius * radius:
+        return 0.0
+    dx, dy = x1 - x0, y1 - y0
+    a = dx * dx + dy * dy
+    if a == 0:
+        return None
+    b = 2 * (x0 * dx + y0 * dy)
+    c = x0 * x0 + y0 * y0 - radius * radius
+    disc = b * b - 4 * a * c
+    if disc <= 0:
+        return None
+    s = (-b - math.sqrt(disc)) / (2 * a)
+    return s if 0 <= s <= 1 else None
+
+
+def swept_capture_batch(x0, y0, x1, y1, radius):
+    # Array form of swept_capture; rows without a crossing this step are NaN
+    dx, dy = x1 - x0, y1 - y0
+    a = dx * dx + dy * dy
+    b = 2 * (x0 * dx + y0 * dy)
+    c = x0 * x0 + y0 * y0 - radius * radius
+    disc = b * b - 4 * a * c
+    hit = (a > 0) & (disc > 0)
+    s = np.full(np.shape(a), np.nan)
+    s[hit] = (-b[hit] - np.sqrt(disc[hit])) / (2 * a[hit])
+    s[(s < 0) | (s > 1)] = np.nan
+    s[c < 0] = 0.0
+    return s
+
+
+# ------------------ Trajectory Log ------------------
+# Binary log of one run: magic + format version (8 bytes), a little-endian uint32 header size, a
+# JSON header with the run parameters and outcome (padded so frames start on a 16-byte boundary),
+# then one little-endian float32 frame per step (20 bytes). Frame 0 is the initial state.
+# replay.py plays logs back without re-running the physics.
+LOG_MAGIC = b"RPLOG\x00\x01\x00"
+LOG_FIELDS = ("agent_x", "agent_y", "agent_heading", "target_x", "target_y")
+
+
+def write_trajectory_log(filename, header, frames):
+    frames = np.asarray(frames, dtype="<f4").reshape(-1, len(LOG_FIELDS))
+    header = dict(header, fields=LOG_FIELDS, frames=len(frames), sim_version=SIM_VERSION)
+    blob = json.dumps(header, default=float).encode()  # NumPy scalars in the parameters
+    blob += b" " * (-(len(LOG_MAGIC) + 4 + len(blob)) % 16)
+    with open(filename, "wb") as f:
+        f.write(LOG_MAGIC)
+        f.write(struct.pack("<I", len(blob)))
+        f.write(blob)
+        f.write(frames.tobytes())
+
+
+def read_trajectory_log(filename):
+    # Header dict and a read-only memory-mapped (frames, 5) float32 array
+    with open(filename, "rb") as f:
+        if f.read(len(LOG_MAGIC)) != LOG_MAGIC:
+            raise ValueError(f"Not a trajectory log: {filename}")
+        size, = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(size))
+    if header["frames"] == 0:
+        return header, np.empty((0, len(LOG_FIELDS)), dtype="<f4")
+    frames = np.memmap(filename, dtype="<f4", mode="r", offset=len(LOG_MAGIC) + 4 + size,
+                       shape=(header["frames"], len(LOG_FIELDS)))
+    return header, frames
+
+
+# ------------------ Phase Profiling ------------------
+# With profile=True every result gets a "profile" dict of seconds spent per phase. Disabled runs
+# only pay one boolean test per phase. Breakdowns travel inside the results, so they work across
+# sweep workers and the result cache; profile_breakdown aggregates them.
+PHASES = ("target_update", "delay_line", "agent_update", "capture_test", "rendering", "event_pump")
+
+
+def profile_breakdown(results):
+    # Total seconds, share of the profiled time and microseconds per step for each phase, over all
+    # profiled results and per strategy
+    def summarize(group):
+        seconds = {phase: sum(res["profile"][phase] for res in group) for phase in PHASES}
+        total = sum(seconds.values())
+        steps = sum(res["steps"] for res in group)
+        return {
+            "runs": len(group),
+            "steps": steps,
+            "total_seconds": total,
+            "seconds": seconds,
+            "share": {phase: sec / total if total else 0.0 for phase, sec in seconds.items()},
+            "us_per_step": {phase: 1e6 * sec / steps if steps else 0.0 for phase, sec in seconds.items()},
+        }
+
+    profiled = [res for res in results if res.get("profile")]
+    by_strategy = defaultdict(list)
+    for res in profiled:
+        by_strategy[res["strategy"]].append(res)
+    return {"overall": summarize(profiled),
+            "by_strategy": {strat: summarize(group) for strat, group in by_strategy.items()}}
+
+
+def save_profile_json(results, filename="profile.json", per_run=False):
+    report = profile_breakdown(results)
+    if per_run:
+        report["runs"] = [{"strategy": res["strategy"], "agent_start": res["agent_start"],
+                           "target_start": res["target_start"], "steps": res["steps"], "seconds": res["profile"]}
+                          for res in results if res.get("profile")]
+    with open(filename, "w") as f:
+        json.dump(report, f, indent=2)
+    return report
 
 
 # ------------------ Simulation Controller ------------------
 
 def run_single_simulation(strat, agent_start=(100, 300), target_start=(300, 300), target_path='sinusoidal', visualize=False,
-                          duration=5, frame_delay=0, theta_CB=30, Kp=2.0, Ki=0.5, Kd=4, agent_kwargs=None):
+                          duration=5, frame_delay=0, theta_CB=30, Kp=2.0, Ki=0.5, Kd=4, agent_kwargs=None, verbose=True,
+                          record_every=1, continuous_capture=False, sim_fps=None, render_fps=None,
+                          integrator="semi_implicit", profile=False, display=None, log_file=None):
+    # record_every keeps every k-th trajectory point (0 disables recording).
+    # continuous_capture interpolates the capture time inside a step instead of testing frame ends only.
+    # sim_fps sets the physics step (dt = 1/sim_fps) and render_fps the display rate, both default FPS.
+    # Visual runs pace physics to wall-clock time and interpolate frames (see Display Session).
+    # profile adds a per-phase timing breakdown to the result (see Phase Profiling).
+    # display reuses an open DisplaySession; without one a visual run opens and closes its own window.
+    # log_file writes a binary trajectory log of the run (see Trajectory Log).
     if agent_kwargs is None:
         agent_kwargs = {}
+    sim_fps = sim_fps or FPS
+    render_fps = render_fps or FPS
+    max_steps = int(duration * sim_fps)
 
+    # A run never needs more noise pairs than it has steps
+    agent_kwargs = dict({"noise_block": min(NOISE_BLOCK, max(1, max_steps))}, **agent_kwargs)
     agent = Agent(*agent_start, speed=100, strategy=strat, theta_set_deg=theta_CB, Kp=Kp, Ki=Ki, Kd=Kd,
-                  camouflage_point=agent_start, **agent_kwargs)
-
-    if visualize:
-        pygame.init()
-        screen = pygame.display.set_mode((WIDTH, HEIGHT))
-        font = pygame.font.SysFont("arial", 24)
-    else:
-        screen = None
-        font = None
-
-    if frame_delay > 0:
-        target_history = deque(maxlen=frame_delay + 1)
-
-    clock = pygame.time.Clock()
-
-    target = Target(*target_start, speed=70, wave_amplitude=60, wave_length=120, mode=target_path)
+                  camouflage_point=agent_start, record_every=record_every, fps=sim_fps, integrator=integrator,
+                  **agent_kwargs)
+
+    own_display = visualize and display is None
+    if own_display:
+        display = DisplaySession()
+    elif visualize:
+        display.clear()
+    # Headless runs are not throttled to wall-clock time; simulated time only advances with t
+
+    target = Target(*target_start, speed=70, wave_amplitude=60, wave_length=120, mode=target_path,
+                    record_every=record_every, fps=sim_fps)
+    track = TRACK_CACHE.get(target_start, target.speed, target.amp, target.wavelength, target.mode, duration,
+                            fps=sim_fps)
+    # One list copy per run: per-step indexing of Python lists is cheaper than of NumPy scalars
+    track_x, track_y = track[0].tolist(), track[1].tolist()
 
     capture_radius = 15
     t = 0
     time_to_capture = None
     running = True
     final_elapsed_time = None
+    min_distance = math.inf
+    time_of_min_distance = None
+    rel_x, rel_y = target.x - agent.x, target.y - agent.y
+
+    now = time.perf_counter
+    phase_time = [0.0] * len(PHASES)
 
-    max_steps = int(duration * FPS)
+    def render(alpha):
+        # Agent and target drawn between the previous and the newest step
+        agent_x, agent_y, heading, target_x, target_y = previous
+        display.erase()
+        drawn = [display.draw_target(target_x + alpha * (target.x - target_x), target_y + alpha * (target.y - target_y)),
+                 display.draw_agent(agent_x + alpha * (agent.x - agent_x), agent_y + alpha * (agent.y - agent_y),
+                                    heading + alpha * wrap_angle(agent.heading - heading))]
+
+        elapsed_time = max(t - 1 + alpha, 0) / sim_fps
+        display_time = final_elapsed_time if final_elapsed_time else elapsed_time
+
+        time_display = f"Time: {display_time:.2f}s"
+        if time_to_capture:
+            time_display += f" | Time to capture = {time_to_capture:.2f}s"
+
+        drawn.append(display.draw_text(time_display + display.status()))
+        display.present(drawn)
+
+    if visualize:
+        display.start_playback(sim_fps)
+        previous = (agent.x, agent.y, agent.heading, target.x, target.y)
+        steps_due = 0
+    log_frames = [(agent.x, agent.y, agent.heading, target.x, target.y)] if log_file else None
     while running and t < max_steps:
+        if visualize and steps_due == 0:
+            # Frame boundary: draw, handle input, then wait until physics is due again
+            if profile:
+                t0 = now()
+            render(display.alpha)
+            if profile:
+                t1 = now()
+                phase_time[4] += t1 - t0
+            if not display.poll():
+                running = False
+            if profile:
+                phase_time[5] += now() - t1
+            steps_due = display.advance(render_fps)  # throttling is not counted
+            continue
         if visualize:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-
-        target.update(t / FPS)
-        if frame_delay > 0:
-            target_history.append((target.x, target.y))
-            if len(target_history) > frame_delay:
-                delayed_x, delayed_y = target_history[0]
-            else:
-                delayed_x, delayed_y = target.x, target.y
-        else:
-            delayed_x, delayed_y = target.x, target.y
+            previous = (agent.x, agent.y, agent.heading, target.x, target.y)
+            steps_due -= 1
+
+        if profile:
+            t0 = now()
+        # Same positions target.update would give, read from the shared precomputed track
+        target.x, target.y = track_x[t], track_y[t]
+        if profile:
+            t1 = now()
+            phase_time[0] += t1 - t0
+        # The delayed position is read from the same track lists, so no history buffer is needed;
+        # before frame_delay steps have passed the agent sees the current position
+        seen = t - frame_delay if t >= frame_delay else t
+        delayed_x, delayed_y = track_x[seen], track_y[seen]
+        if profile:
+            t0 = now()
+            phase_time[1] += t0 - t1
 
         agent.update(delayed_x, delayed_y)
+        if profile:
+            t1 = now()
+            phase_time[2] += t1 - t0
 
         dx, dy = target.x - agent.x, target.y - agent.y
         dist = math.hypot(dx, dy)
-        if dist < capture_radius and not agent.captured:
+        if dist < min_distance:
+            min_distance = dist
+            time_of_min_distance = t / sim_fps
+        if continuous_capture:
+            s = swept_capture(rel_x, rel_y, dx, dy, capture_radius)
+            rel_x, rel_y = dx, dy
+            captured = s is not None
+        else:
+            captured = dist < capture_radius
+        if captured and not agent.captured:
             agent.captured = True
             running = False
             target.captured = True
-            time_to_capture = t / FPS
+            time_to_capture = (t + s) / sim_fps if continuous_capture else t / sim_fps
             final_elapsed_time = time_to_capture
+        if profile:
+            phase_time[3] += now() - t1
+        if log_frames is not None:
+            log_frames.append((agent.x, agent.y, agent.heading, target.x, target.y))
 
-        if visualize:
-            screen.fill((240, 240, 240))
-            pygame.draw.circle(screen, (200, 0, 0), (int(target.x), int(target.y)), 12)
-            agent.draw(screen)
-
-            elapsed_time = t / FPS
-            display_time = final_elapsed_time if final_elapsed_time else elapsed_time
-
-            time_display = f"Time: {display_time:.2f}s"
-            if time_to_capture:
-                time_display += f" | Time to capture = {time_to_capture:.2f}s"
+        t += 1
 
-            text = font.render(time_display, True, (0, 0, 0))
-            screen.blit(text, (20, 20))
-            pygame.display.flip()
+    if visualize and display.open:
+        render(1.0)
 
-        t += 1
-        clock.tick(FPS)
+    target.trajectory.extend(track[0, :t], track[1, :t])
+    if t > 0:
+        target.trajectory.finish(target.x, target.y)
+        agent.trajectory.finish(agent.x, agent.y)
 
     # Auto-close delay after simulation ends
-    if visualize:
-        pygame.time.wait(2000)  # Wait 2 seconds
-        pygame.quit()
+    if own_display:
+        display.hold(2000)  # Wait 2 seconds
+        display.close()
 
     success = time_to_capture is not None
 
-    print(f"Strategy: {strat} | Time to capture: {time_to_capture}s | Success: {success}")
+    if verbose:
+        print(f"Strategy: {strat} | Time to capture: {time_to_capture}s | Success: {success}")
 
-    return {
-        # "agent_traj": agent.trajectory,
-        # "target_traj": target.trajectory,
+    result = {
+        "agent_traj": agent.trajectory.array(),
+        "target_traj": target.trajectory.array(),
         "time_to_capture": time_to_capture,
         "agent_start": agent_start,
         "target_start": target_start,
@@ -254,23 +1015,224 @@ def run_single_simulation(strat, agent_start=(100, 300), target_start=(300, 300)
         "camouflage_point": agent.camouflage_point,
         "frame_delay": frame_delay,
         "target_path": target_path,
-        "angle_noise_std": getattr(agent, 'angle_noise_std', 0)
+        "angle_noise_std": getattr(agent, 'angle_noise_std', 0),
+        "noise_seed": agent.noise.seed if agent.noise is not None else None,
+        "steps": t,
+        "path_length": agent.path_length,
+        "min_distance": min_distance,
+        "time_of_min_distance": time_of_min_distance,
+        "heading_change": agent.heading_change
     }
+    if profile:
+        result["profile"] = dict(zip(PHASES, phase_time))
+    if log_file:
+        header = {key: result[key] for key in ("strategy", "agent_start", "target_start", "target_path", "frame_delay",
+                                               "angle_noise_std", "time_to_capture", "success", "steps")}
+        header.update({"duration": duration, "theta_CB": theta_CB, "Kp": Kp, "Ki": Ki, "Kd": Kd, "sim_fps": sim_fps,
+                       "integrator": integrator, "continuous_capture": continuous_capture})
+        write_trajectory_log(log_file, header, log_frames)
+    return result
 
 
 def run_batch_simulations(strat, scenarios, visual=False, frame_delay=0, theta_CB=30, 
-                            Kp=2.0, Ki=0.5, Kd=4, target_path='sinusoidal', duration=5):
+                            Kp=2.0, Ki=0.5, Kd=4, target_path='sinusoidal', duration=5, vectorized=False, record_every=1,
+                            profile=False, layout=None):
+    # Visual batches share one window. layout="tiles" or "overlay" shows every scenario at once,
+    # stepped in lockstep by the vectorized engine; otherwise scenarios play one after another.
+    # vectorized=True can change results, for any strategy once frame_delay is set (see run_vectorized_simulations).
+    # Closing the window stops the batch and returns the runs finished so far.
+    if vectorized and not visual:
+        return run_vectorized_simulations(strat, scenarios, frame_delay=frame_delay, theta_CB=theta_CB,
+                                          Kp=Kp, Ki=Ki, Kd=Kd, target_path=target_path, duration=duration,
+                                          profile=profile)
+
+    display = DisplaySession() if visual else None
+    if visual and layout is not None:
+        results = run_vectorized_simulations(strat, scenarios, frame_delay=frame_delay, theta_CB=theta_CB,
+                                             Kp=Kp, Ki=Ki, Kd=Kd, target_path=target_path, duration=duration,
+                                             profile=profile, display=display, layout=layout)
+    else:
+        results = []
+        for i, (a_start, t_start) in enumerate(scenarios):
+            if display is not None and not display.open:
+                break
+            print(f"\nRunning scenario {i+1}: Agent@{a_start}, Target@{t_start}")
+            result = run_single_simulation(strat, agent_start=a_start, target_start=t_start, Kp=Kp, Ki=Ki, Kd=Kd,
+                                           visualize=visual, frame_delay=frame_delay, target_path=target_path,
+                                           duration=duration, theta_CB=theta_CB, record_every=record_every,
+                                           profile=profile, display=display)
+            results.append(result)
+            print(f"Run {i+1} | Time to capture: {result['time_to_capture']}s | Success: {result['success']}")
+
+    if display is not None:
+        if display.open:
+            display.hold(2000)
+        display.close()
+    return results
+
+
+def run_vectorized_simulations(strat, scenarios, frame_delay=0, theta_CB=30, Kp=2.0, Ki=0.5, Kd=4,
+                               target_path='sinusoidal', duration=5, angle_noise_std=0, noise_seed=None, log_theta_r=False,
+                               continuous_capture=False, sim_fps=None, integrator="semi_implicit", profile=False,
+                               display=None, layout="overlay", render_fps=None):
+    # Headless equivalent of run_batch_simulations: every scenario is stepped together.
+    # With a DisplaySession every scenario is drawn each frame, overlaid in distinct colours or
+    # in tiles (layout="tiles").
+    # Gains, theta_CB, frame_delay, target_path and angle_noise_std may be scalars or one value per scenario.
+    # Results are close to, but not the same as, run_single_simulation's: np.arctan2 can round
+    # differently from math.atan2 in the last bit. Proportional and parallel navigation amplify that
+    # even without delay (capture times differing by a second or more, or capture vs timeout), and
+    # with a frame_delay any strategy can drift (e.g. simple capturing a few steps apart).
+    # Do not mix the two engines within one comparison.
+    n = len(scenarios)
+    agent_starts = [tuple(a) for a, _ in scenarios]
+    target_starts = [tuple(t) for _, t in scenarios]
+    ax0, ay0 = np.array(agent_starts, dtype=float).T
+    tx0, ty0 = np.array(target_starts, dtype=float).T
+
+    sim_fps = sim_fps or FPS
+    max_steps = int(duration * sim_fps)
+    agent = AgentBatch(ax0, ay0, speed=100, strategy=strat, theta_set_deg=theta_CB, Kp=Kp, Ki=Ki, Kd=Kd,
+                       angle_noise_std=angle_noise_std, noise_seed=noise_seed, log_theta_r=log_theta_r,
+                       fps=sim_fps, integrator=integrator, noise_block=min(NOISE_BLOCK, max(1, max_steps)))
+    target = TargetBatch(tx0, ty0, speed=70, wave_amplitude=60, wave_length=120, mode=target_path, fps=sim_fps)
+
+    delays = _as_rows(frame_delay, n, dtype=int)
+    delay_line = DelayLine(delays)
+
+    capture_radius = 15
+    time_to_capture = np.full(n, np.nan)
+    min_distance = np.full(n, np.inf)
+    time_of_min_distance = np.full(n, np.nan)
+    rel_x, rel_y = target.x - agent.x, target.y - agent.y
+
+    if display is not None:
+        render_fps = render_fps or FPS
+        if layout == "tiles":
+            views = display.tile_views(n)
+            sprites = [agent_sprites(scale=view[2]) for view in views]
+            target_colours = [(200, 0, 0)] * n
+            display.clear(views)
+        else:
+            views = [FULL_VIEW] * n
+            target_colours = [SCENARIO_COLOURS[i % len(SCENARIO_COLOURS)] for i in range(n)]
+            sprites = [agent_sprites(colour) for colour in target_colours]
+            display.clear()
+
+    def render(alpha):
+        agent_x, agent_y, heading, target_x, target_y = previous
+        ax = agent_x + alpha * (agent.x - agent_x)
+        ay = agent_y + alpha * (agent.y - agent_y)
+        ah = heading + alpha * wrap_angle(agent.heading - heading)
+        tx = target_x + alpha * (target.x - target_x)
+        ty = target_y + alpha * (target.y - target_y)
+        display.erase()
+        drawn = []
+        for i in range(n):
+            drawn.append(display.draw_target(tx[i], ty[i], target_colours[i], views[i]))
+            drawn.append(display.draw_agent(ax[i], ay[i], ah[i], sprites[i], views[i]))
+        drawn.append(display.draw_text(f"Time: {max(t - 1 + alpha, 0) / sim_fps:.2f}s | "
+                                       f"Captured {agent.captured.sum()}/{n}" + display.status()))
+        display.present(drawn)
+
+    t = 0
+    now = time.perf_counter
+    phase_time = [0.0] * len(PHASES)
+    if display is not None:
+        display.start_playback(sim_fps)
+        # The batch arrays are replaced, not modified, on every update, so keeping references is enough
+        previous = (agent.x, agent.y, agent.heading, target.x, target.y)
+        steps_due = 0
+    while t < max_steps and not agent.captured.all():
+        if display is not None and steps_due == 0:
+            if profile:
+                t0 = now()
+            render(display.alpha)
+            if profile:
+                t1 = now()
+                phase_time[4] += t1 - t0
+            display.poll()
+            if profile:
+                phase_time[5] += now() - t1
+            if not display.open:
+                break
+            steps_due = display.advance(render_fps)
+            continue
+        if display is not None:
+            previous = (agent.x, agent.y, agent.heading, target.x, target.y)
+            steps_due -= 1
+
+        if profile:
+            t0 = now()
+        target.update()
+        if profile:
+            t1 = now()
+            phase_time[0] += t1 - t0
+        delay_line.push(target.x, target.y)
+        seen_x, seen_y = delay_line.read()
+        if profile:
+            t0 = now()
+            phase_time[1] += t0 - t1
+        agent.update(seen_x, seen_y)
+        if profile:
+            t1 = now()
+            phase_time[2] += t1 - t0
+
+        dx, dy = target.x - agent.x, target.y - agent.y
+        dist = np.hypot(dx, dy)
+        closer = (dist < min_distance) & ~agent.captured
+        min_distance[closer] = dist[closer]
+        time_of_min_distance[closer] = t / sim_fps
+        if continuous_capture:
+            s = swept_capture_batch(rel_x, rel_y, dx, dy, capture_radius)
+            rel_x, rel_y = dx, dy
+            newly_captured = ~np.isnan(s) & ~agent.captured
+            time_to_capture[newly_captured] = (t + s[newly_captured]) / sim_fps
+        else:
+            newly_captured = (dist < capture_radius) & ~agent.captured
+            time_to_capture[newly_captured] = t / sim_fps
+        agent.captured |= newly_captured
+        target.captured |= newly_captured
+        if profile:
+            phase_time[3] += now() - t1
+
+        t += 1
+
+    if display is not None and display.open:
+        render(1.0)
+
+    theta_r_log = np.array(agent.theta_r_log) if agent.theta_r_log else np.empty((0, n))
+    paths = _as_rows(target_path, n, dtype=object)
+    noise = _as_rows(angle_noise_std, n)
     results = []
-    for i, (a_start, t_start) in enumerate(scenarios):
-        print(f"\nRunning scenario {i+1}: Agent@{a_start}, Target@{t_start}")
-        result = run_single_simulation(strat, agent_start=a_start, target_start=t_start, Kp=Kp, Ki=Ki, Kd=Kd,
-                                       visualize=visual, frame_delay=frame_delay, target_path=target_path,
-                                       duration=duration, theta_CB=theta_CB)
-        results.append(result)
-        print(f"Run {i+1} | Time to capture: {result['time_to_capture']}s | Success: {result['success']}")
+    for i in range(n):
+        captured = bool(agent.captured[i])
+        results.append({
+            "time_to_capture": float(time_to_capture[i]) if captured else None,
+            "agent_start": agent_starts[i],
+            "target_start": target_starts[i],
+            "success": captured,
+            "strategy": strat,
+            "theta_r_log": theta_r_log[:agent.steps[i], i].tolist(),
+            "camouflage_point": agent_starts[i],
+            "frame_delay": int(delays[i]),
+            "target_path": paths[i],
+            "angle_noise_std": float(noise[i]),
+            "noise_seed": agent.noise.seeds[i] if agent.noise is not None else None,
+            "steps": int(agent.steps[i]),
+            "path_length": float(agent.path_length[i]),
+            "min_distance": float(min_distance[i]),
+            "time_of_min_distance": float(time_of_min_distance[i]) if agent.steps[i] else None,
+            "heading_change": float(agent.heading_change[i])
+        })
+        if profile:
+            # Every scenario shares the batch's steps, so each gets an even share of the phase times
+            results[-1]["profile"] = {phase: sec / n for phase, sec in zip(PHASES, phase_time)}
     return results
 
 def plot_motion_camouflage_lines(result):
+    import matplotlib.pyplot as plt
+
     agent_traj = np.array(result["agent_traj"])
     target_traj = np.array(result["target_traj"])
     camo = np.array(result["camouflage_point"])
@@ -302,6 +1264,8 @@ def plot_motion_camouflage_lines(result):
     plt.show()
 
 def plot_all_trajectories(results, name="trial", save=False, show=True):
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(10, 8))
     colors = plt.get_cmap('Dark2', len(results))  # or try 'Set1', 'Set3', 'Pastel1'
     # colors = cm.get_cmap('tab10', len(results))  # distinct colors
@@ -351,14 +1315,13 @@ def save_results_to_csv(results, filename="pursuit_results.csv"):
         for i, res in enumerate(results):
             strategy = res.get("strategy", "SimplePursuit")
             time_to_capture = res["time_to_capture"]
-            traj = res["agent_traj"]
 
-            # Path length calculation
-            path_length = 0
-            for j in range(1, len(traj)):
-                dx = traj[j][0] - traj[j-1][0]
-                dy = traj[j][1] - traj[j-1][1]
-                path_length += math.hypot(dx, dy)
+            # Path length, accumulated online during the run when available
+            if "path_length" in res:
+                path_length = res["path_length"]
+            else:
+                traj = np.asarray(res["agent_traj"])
+                path_length = np.hypot(*np.diff(traj, axis=0).T).sum()
 
             # Start distance
             dx = res["target_start"][0] - res["agent_start"][0]
@@ -375,6 +1338,8 @@ def save_results_to_csv(results, filename="pursuit_results.csv"):
             ])
 
 def plot_sine_line(all_times, x_axis, x_label, save=False, name=''):
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(6, 5))
     plt.plot(x_axis, all_times[0], "-x")
     plt.plot(x_axis, all_times[1], "-x")
@@ -423,25 +1388,30 @@ if __name__ == "__main__":
     # params = [0.8, 1, 2, 3, 4, 5, 7, 10, 15, 20] # kd - 10
     # params = [0.5, 1, 2, 5, 7, 10, 15, 20] # motion camouflage kp - 7
 
-    all_times = []
-    for tpath in ["sinusoidal", "linear"]:
-        time_taken = []
-        for k in params:
-            results = run_batch_simulations(strategy, scenarios, visual=False, frame_delay=0,
-                                            Kp=k, Ki=0, Kd=0,
-                                            target_path=tpath, duration=60, theta_CB=50)
-            
-            time_to_captureS = [item["time_to_capture"] for item in results]
-            mean_time = np.mean(time_to_captureS)
-            print(mean_time)
-            time_taken.append(mean_time)
-            # save_results_to_csv(results, filename=f'{strategy}_Kp{k}.csv')
-            # plot_all_trajectories(results, name=f"{strategy}_Kp{k}", save=True, show=False)
-        all_times.append(time_taken)
+    from sweep import make_sweep_grid, run_sweep, group_mean, ResultCache, ResultStore
+
+    target_paths = ["sinusoidal", "linear"]
+    jobs = make_sweep_grid([strategy], params, [0], [0], [50], [0], target_paths, scenarios)
+    store = ResultStore("Data/sweep_results", mode="w")  # one row per run, replaces per-setting CSVs
+    results = run_sweep(jobs, duration=60, cache=ResultCache("sweep_cache.sqlite"), store=store)
+    means = group_mean(store.load(), ["target_path", "Kp"], timeout=60)
+    means = dict(zip(zip(means["target_path"], means["Kp"]), means["mean"]))
+
+    all_times = [[means[(tpath, k)] for k in params] for tpath in target_paths]
+    time_taken, mean_time = all_times[-1], all_times[-1][-1]
+    # save_results_to_csv(results, filename=f'{strategy}_Kp{k}.csv')
+    # plot_all_trajectories(results, name=f"{strategy}_Kp{k}", save=True, show=False)
     
     print(all_times, time_taken, mean_time)
     plot_sine_line(all_times, params, x_label="Angle (degrees)", save=True, name="simple_tuning")
 
+    ########################### AUTO-TUNE ######################################
+
+    # from autotune import auto_tune
+    # tuned = auto_tune("parallel_navigation", scenarios, {"Kd": (0.5, 20)}, target_path="linear",
+    #                   fixed={"Kp": 15, "Ki": 0}, max_evals=20)
+    # print(tuned["best"], tuned["mean_time_to_capture"], tuned["evaluations"])
+
     ########################### BOXPLOT #########################################
 
     # all_strats = ["simple", "constant_bearing", "parallel_navigation", "motion_camouflage"]
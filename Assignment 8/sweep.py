@@ -0,0 +1,410 @@
+import hashlib
+import json
+import math
+import os
+import pickle
+import random
+import sqlite3
+import zlib
+from collections import namedtuple
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from itertools import product
+
+import numpy as np
+
+from robo_pursuit import FPS, HEIGHT, SIM_VERSION, WIDTH, run_single_simulation, run_vectorized_simulations
+
+# ------------------ Sweep Jobs ------------------
+SweepJob = namedtuple("SweepJob", ["strategy", "Kp", "Ki", "Kd", "theta_CB", "frame_delay", "target_path", "scenario"])
+
+
+def make_sweep_grid(strategies, Kps, Kis, Kds, theta_CBs, frame_delays, target_paths, scenarios):
+    # Full cartesian grid, scenario varying fastest
+    return [SweepJob(*values) for values in
+            product(strategies, Kps, Kis, Kds, theta_CBs, frame_delays, target_paths, scenarios)]
+
+
+def seed_job(base_seed, index):
+    # Every job gets its own seed, so results do not depend on which worker or chunk ran it
+    random.seed(base_seed + index)
+    np.random.seed([base_seed, index])
+
+
+def scenario_noise_seed(base_seed, scenario):
+    # Same scenario -> same noise stream, so strategies and gains are compared on paired noise
+    return [base_seed, zlib.crc32(repr(tuple(map(tuple, scenario))).encode())]
+
+
+def _job_result(job, result):
+    result.update({"Kp": job.Kp, "Ki": job.Ki, "Kd": job.Kd, "theta_CB": job.theta_CB})
+    return result
+
+
+def _run_chunk(indices, jobs, base_seed, vectorized, angle_noise_std, run_kwargs):
+    # indices are the jobs' positions in the full grid (used for seeding);
+    # run_kwargs holds the settings shared by every job (duration, sim_fps, integrator, ...)
+    if not vectorized:
+        results = []
+        for index, job in zip(indices, jobs):
+            seed_job(base_seed, index)
+            agent_kwargs = {"angle_noise_std": angle_noise_std,
+                            "noise_seed": scenario_noise_seed(base_seed, job.scenario)}
+            result = run_single_simulation(job.strategy, agent_start=job.scenario[0], target_start=job.scenario[1],
+                                           target_path=job.target_path, frame_delay=job.frame_delay,
+                                           theta_CB=job.theta_CB, Kp=job.Kp, Ki=job.Ki, Kd=job.Kd,
+                                           agent_kwargs=agent_kwargs, verbose=False, **run_kwargs)
+            results.append(_job_result(job, result))
+        return results
+
+    # One vectorized run per strategy present in the chunk, scattered back into job order
+    seed_job(base_seed, indices[0])
+    run_kwargs = {k: v for k, v in run_kwargs.items() if k != "record_every"}
+    results = [None] * len(jobs)
+    for strat in dict.fromkeys(job.strategy for job in jobs):
+        idx = [i for i, job in enumerate(jobs) if job.strategy == strat]
+        group = [jobs[i] for i in idx]
+        batch = run_vectorized_simulations(strat, [job.scenario for job in group],
+                                           frame_delay=[job.frame_delay for job in group],
+                                           theta_CB=[job.theta_CB for job in group],
+                                           Kp=[job.Kp for job in group], Ki=[job.Ki for job in group],
+                                           Kd=[job.Kd for job in group],
+                                           target_path=[job.target_path for job in group],
+                                           angle_noise_std=angle_noise_std,
+                                           noise_seed=[scenario_noise_seed(base_seed, job.scenario) for job in group],
+                                           **run_kwargs)
+        for i, job, result in zip(idx, group, batch):
+            results[i] = _job_result(job, result)
+    return results
+
+
+def run_sweep(jobs, duration=60, max_workers=None, chunksize=None, base_seed=0, vectorized=False, record_every=0,
+              sim_fps=None, integrator="semi_implicit", angle_noise_std=0, cache=None, profile=False, store=None,
+              executor=None):
+    # Runs every job across a process pool; results come back in the same order as jobs.
+    # Trajectories are not recorded unless record_every is set, to keep results cheap to ship back.
+    # With a ResultCache, jobs already in the store are skipped and each finished chunk is
+    # written straight away, so an interrupted sweep resumes where it stopped.
+    # vectorized results are not interchangeable with scalar ones (proportional and parallel navigation
+    # at any delay, every strategy with frame_delay; see run_vectorized_simulations), so the engine is
+    # part of the cache key and one comparison should not mix engines.
+    # profile adds per-phase timings to every result; aggregate them with robo_pursuit.profile_breakdown.
+    # A ResultStore receives every result of the sweep (cached ones included) as columnar chunks.
+    # An executor passed in is used instead of a new pool and left running, for callers that sweep repeatedly.
+    jobs = list(jobs)
+    run_kwargs = {"duration": duration, "record_every": record_every, "sim_fps": sim_fps or FPS,
+                  "integrator": integrator}
+    if profile:
+        # Only set when enabled, so run keys of existing unprofiled cache entries stay the same
+        run_kwargs["profile"] = True
+    results = [None] * len(jobs)
+
+    if cache is not None:
+        keys = [run_key(job, base_seed, vectorized, angle_noise_std, run_kwargs) for job in jobs]
+        cached = cache.get_many(keys)
+        for i, key in enumerate(keys):
+            results[i] = cached.get(key)
+    todo = [i for i, res in enumerate(results) if res is None]
+    if store is not None:
+        # Cached results only go to the store when it does not already hold their row (e.g. a fresh store)
+        done = [i for i, res in enumerate(results) if res is not None and i not in store.job_indices]
+        store.append([results[i] for i in done], job_index=done)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, math.ceil(len(todo) / (max_workers * 4)))
+    chunks = [todo[s:s + chunksize] for s in range(0, len(todo), chunksize)]
+
+    def collect(indices, chunk_results):
+        for i, res in zip(indices, chunk_results):
+            results[i] = res
+        if cache is not None:
+            cache.put_many([(keys[i], res) for i, res in zip(indices, chunk_results)])
+        if store is not None:
+            store.append(chunk_results, job_index=indices)
+
+    if max_workers == 1 and executor is None:
+        for indices in chunks:
+            collect(indices, _run_chunk(indices, [jobs[i] for i in indices], base_seed, vectorized,
+                                      angle_noise_std, run_kwargs))
+    else:
+        pool = nullcontext(executor) if executor is not None else ProcessPoolExecutor(max_workers=max_workers)
+        with pool as executor:
+            futures = {executor.submit(_run_chunk, indices, [jobs[i] for i in indices], base_seed, vectorized,
+                                       angle_noise_std, run_kwargs): indices
+                       for indices in chunks}
+            for future in as_completed(futures):
+                collect(futures[future], future.result())
+
+    return results
+
+
+def worker_pool(executor=None, max_workers=None):
+    # Pool for callers that run many small sweeps; pass what it yields to run_sweep as executor.
+    # An executor given here is yielded as is and left running; max_workers=1 yields None (in-process).
+    if executor is not None:
+        return nullcontext(executor)
+    max_workers = max_workers or os.cpu_count() or 1
+    return nullcontext() if max_workers == 1 else ProcessPoolExecutor(max_workers=max_workers)
+
+
+# ------------------ Result Cache ------------------
+def run_key(job, base_seed, vectorized, angle_noise_std, run_kwargs):
+    # Stable content hash of everything that determines a run's result, plus the simulator version
+    inputs = {
+        "version": SIM_VERSION,
+        "strategy": job.strategy,
+        "gains": [float(job.Kp), float(job.Ki), float(job.Kd), float(job.theta_CB)],
+        "frame_delay": int(job.frame_delay),
+        "target_path": job.target_path,
+        "scenario": [[float(v) for v in point] for point in job.scenario],
+        "engine": "vectorized" if vectorized else "scalar",
+        "run": {k: run_kwargs[k] for k in sorted(run_kwargs)},
+        # The seed only matters through the noise streams
+        "noise": [float(angle_noise_std), base_seed if angle_noise_std else None],
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    # Results stored by run_key in a single SQLite file next to the sweep data
+    def __init__(self, path="sweep_cache.sqlite"):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result BLOB)")
+        self._db.commit()
+
+    def get_many(self, keys):
+        found = {}
+        keys = list(keys)
+        for s in range(0, len(keys), 500):  # stay under SQLite's bound-parameter limit
+            batch = keys[s:s + 500]
+            rows = self._db.execute(f"SELECT key, result FROM results WHERE key IN ({','.join('?' * len(batch))})",
+                                    batch)
+            found.update((key, pickle.loads(blob)) for key, blob in rows)
+        return found
+
+    def put_many(self, items):
+        self._db.executemany("INSERT OR REPLACE INTO results (key, result) VALUES (?, ?)",
+                             [(key, pickle.dumps(result)) for key, result in items])
+        self._db.commit()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+
+# ------------------ Columnar Result Store ------------------
+# One row per run with a typed column per parameter and metric (None becomes NaN). Every appended
+# chunk is its own NPZ part in the store directory, so a sweep appends as chunks finish without
+# rewriting earlier parts; load() concatenates them. Queries are plain NumPy masks, e.g.
+#   cols = store.load()
+#   cols["time_to_capture"][(cols["strategy"] == "simple") & (cols["Kp"] > 10)]
+# Per-step data (theta_r_log, trajectories) is not stored; use trajectory logs for that.
+
+def results_to_columns(results, job_index=None):
+    # job_index is each result's position in the sweep grid (-1 when unknown), since chunks
+    # are appended in completion order
+    def floats(key):
+        return np.array([np.nan if res.get(key) is None else res[key] for res in results], dtype=np.float64)
+
+    agent_start = np.array([res["agent_start"] for res in results], dtype=np.float64).reshape(-1, 2)
+    target_start = np.array([res["target_start"] for res in results], dtype=np.float64).reshape(-1, 2)
+    return {
+        "job_index": np.asarray(job_index if job_index is not None else [-1] * len(results), dtype=np.int64),
+        "strategy": np.array([res["strategy"] for res in results], dtype=str),
+        "target_path": np.array([res["target_path"] for res in results], dtype=str),
+        "Kp": floats("Kp"),
+        "Ki": floats("Ki"),
+        "Kd": floats("Kd"),
+        "theta_CB": floats("theta_CB"),
+        "frame_delay": np.array([res["frame_delay"] for res in results], dtype=np.int32),
+        "angle_noise_std": floats("angle_noise_std"),
+        "agent_x": agent_start[:, 0],
+        "agent_y": agent_start[:, 1],
+        "target_x": target_start[:, 0],
+        "target_y": target_start[:, 1],
+        "success": np.array([res["success"] for res in results], dtype=bool),
+        "time_to_capture": floats("time_to_capture"),
+        "steps": np.array([res["steps"] for res in results], dtype=np.int64),
+        "path_length": floats("path_length"),
+        "min_distance": floats("min_distance"),
+        "time_of_min_distance": floats("time_of_min_distance"),
+        "heading_change": floats("heading_change"),
+    }
+
+
+class ResultStore:
+    # mode="w" drops the parts already in the directory, mode="a" appends to them. Rows are kept
+    # once per job_index, so rerunning or resuming a sweep into the same store adds no duplicates.
+    def __init__(self, path="sweep_results", mode="a"):
+        if mode not in ("a", "w"):
+            raise ValueError(f"Unknown store mode: {mode}")
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        if mode == "w":
+            for name in self._parts():
+                os.remove(os.path.join(path, name))
+        self.job_indices = set()
+        for name in self._parts():
+            self.job_indices.update(int(i) for i in np.load(os.path.join(path, name))["job_index"] if i >= 0)
+
+    def _parts(self):
+        return sorted(name for name in os.listdir(self.path) if name.startswith("part_") and name.endswith(".npz"))
+
+    def append(self, results, job_index=None):
+        if job_index is not None:
+            keep = [k for k, i in enumerate(job_index) if i < 0 or i not in self.job_indices]
+            results, job_index = [results[k] for k in keep], [job_index[k] for k in keep]
+            self.job_indices.update(i for i in job_index if i >= 0)
+        if not results:
+            return
+        parts = self._parts()
+        number = int(parts[-1][5:-4]) + 1 if parts else 0
+        final = os.path.join(self.path, f"part_{number:06d}.npz")
+        # Written under a temporary name first, so an interrupted sweep never leaves a truncated part
+        with open(final + ".tmp", "wb") as f:
+            np.savez(f, **results_to_columns(results, job_index))
+        os.replace(final + ".tmp", final)
+
+    def load(self, columns=None):
+        parts = [np.load(os.path.join(self.path, name)) for name in self._parts()]
+        if not parts:
+            return {}
+        return {name: np.concatenate([part[name] for part in parts]) for name in columns or parts[0].files}
+
+    def __len__(self):
+        return sum(len(np.load(os.path.join(self.path, name))["job_index"]) for name in self._parts())
+
+
+def group_mean(columns, by, value="time_to_capture", where=None, timeout=None):
+    # Vectorized group-by: mean of `value` per distinct combination of the `by` columns, optionally
+    # over the rows selected by the boolean mask `where`. NaN values (runs without capture) are left
+    # out of the mean unless `timeout` gives them a value. Returns columns as well: one array per
+    # `by` column plus "mean", "count" (values averaged) and "runs" (rows in the group).
+    where = np.ones(len(columns[value]), dtype=bool) if where is None else where
+    values = columns[value][where].astype(np.float64)
+    if timeout is not None:
+        values = np.where(np.isnan(values), timeout, values)
+    valid = ~np.isnan(values)
+
+    uniques, codes = zip(*(np.unique(columns[name][where], return_inverse=True) for name in by))
+    flat = np.ravel_multi_index(codes, [len(u) for u in uniques])
+    groups, inverse = np.unique(flat, return_inverse=True)
+    counts = np.bincount(inverse, weights=valid, minlength=len(groups))
+    sums = np.bincount(inverse, weights=np.where(valid, values, 0), minlength=len(groups))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+
+    key_codes = np.unravel_index(groups, [len(u) for u in uniques])
+    grouped = {name: u[index] for name, u, index in zip(by, uniques, key_codes)}
+    grouped.update({"mean": means, "count": counts.astype(np.int64),
+                    "runs": np.bincount(inverse, minlength=len(groups))})
+    return grouped
+
+
+# ------------------ Successive Halving ------------------
+def race_sweep(candidates, scenarios, initial=2, keep=0.5, growth=2, duration=60, **sweep_kwargs):
+    # candidates are SweepJobs without a scenario, e.g. make_sweep_grid(..., scenarios=[None]).
+    # All candidates run on the first `initial` scenarios; after each round only the best `keep`
+    # fraction survive, and the scenario subset grows by `growth` until every scenario is used.
+    if not 0 < keep <= 1:
+        raise ValueError(f"keep must be in (0, 1], got {keep}")
+    if growth <= 1:
+        raise ValueError(f"growth must be greater than 1, got {growth}")
+    scenarios = list(scenarios)
+    times = [[] for _ in candidates]
+    alive = list(range(len(candidates)))
+    done = 0
+    subset = max(1, initial)
+    with worker_pool(sweep_kwargs.pop("executor", None), sweep_kwargs.get("max_workers")) as executor:
+        while True:
+            subset = min(subset, len(scenarios))
+            jobs = [candidates[i]._replace(scenario=s) for i in alive for s in scenarios[done:subset]]
+            results = run_sweep(jobs, duration=duration, executor=executor, **sweep_kwargs)
+            step = subset - done
+            for k, i in enumerate(alive):
+                times[i].extend(duration if r["time_to_capture"] is None else r["time_to_capture"]
+                                for r in results[k * step:(k + 1) * step])
+            done = subset
+            if done == len(scenarios) or len(alive) == 1:
+                break
+            alive.sort(key=lambda i: np.mean(times[i]))
+            alive = alive[:max(1, math.ceil(len(alive) * keep))]
+            subset = max(subset + 1, int(subset * growth))
+
+    # Candidates that lasted longer rank first, then by mean capture time (timeouts count as duration)
+    order = sorted(range(len(candidates)), key=lambda i: (-len(times[i]), np.mean(times[i])))
+    evaluations = sum(len(t) for t in times)
+    full = len(candidates) * len(scenarios)
+    return {
+        "ranking": [{"candidate": candidates[i], "mean_time_to_capture": float(np.mean(times[i])),
+                     "scenarios_evaluated": len(times[i])} for i in order],
+        "evaluations": evaluations,
+        "full_evaluations": full,
+        "saved": full - evaluations,
+    }
+
+
+# ------------------ Sequential Monte Carlo ------------------
+def random_scenario(rng):
+    # Same distribution as the scenarios drawn in robo_pursuit's __main__
+    return ((rng.randint(0, WIDTH), rng.randint(0, HEIGHT)), (rng.randint(0, WIDTH), rng.randint(0, HEIGHT)))
+
+
+def mean_interval(values, z):
+    mean = float(np.mean(values))
+    if len(values) < 2:
+        return mean, (-math.inf, math.inf)
+    half = z * float(np.std(values, ddof=1)) / math.sqrt(len(values))
+    return mean, (mean - half, mean + half)
+
+
+def wilson_interval(successes, n, z):
+    p = successes / n
+    centre = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return p, (centre - half, centre + half)
+
+
+def monte_carlo_setting(setting, ci_width=0.5, success_ci_width=0.2, confidence=0.95, batch=8, min_runs=8,
+                        max_runs=200, seed=0, duration=60, **sweep_kwargs):
+    # Draws random scenarios for one setting (a SweepJob without scenario) in batches until the
+    # confidence interval of mean capture time (captured runs only) is narrower than ci_width
+    # seconds and the success-rate interval narrower than success_ci_width, or max_runs is hit.
+    # Intervals use the normal approximation (Wilson for the success rate). While no run has
+    # captured there is no capture time to estimate, so only the success-rate interval is checked.
+    if max_runs < 1 or batch < 1:
+        raise ValueError(f"max_runs and batch must be at least 1, got max_runs={max_runs}, batch={batch}")
+    rng = random.Random(seed)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    results = []
+    with worker_pool(sweep_kwargs.pop("executor", None), sweep_kwargs.get("max_workers")) as executor:
+        while True:
+            n_new = min(batch, max_runs - len(results))
+            jobs = [setting._replace(scenario=random_scenario(rng)) for _ in range(n_new)]
+            results.extend(run_sweep(jobs, duration=duration, base_seed=seed, executor=executor, **sweep_kwargs))
+
+            times = [r["time_to_capture"] for r in results if r["success"]]
+            mean_time, time_ci = mean_interval(times, z) if times else (None, (-math.inf, math.inf))
+            success_rate, success_ci = wilson_interval(len(times), len(results), z)
+            converged = (len(results) >= min_runs and (not times or time_ci[1] - time_ci[0] < ci_width)
+                         and success_ci[1] - success_ci[0] < success_ci_width)
+            if converged or len(results) >= max_runs:
+                break
+
+    return {
+        "setting": setting,
+        "runs": len(results),
+        "mean_time_to_capture": mean_time,
+        "time_to_capture_ci": time_ci,
+        "success_rate": success_rate,
+        "success_rate_ci": success_ci,
+        "confidence": confidence,
+        "converged": converged,
+        "results": results,
+    }
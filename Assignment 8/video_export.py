@@ -0,0 +1,119 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from robo_pursuit import DisplaySession, read_trajectory_log, run_single_simulation
+
+# ------------------ Headless Video Export ------------------
+# Runs are rendered off-screen through SDL's dummy video driver, so exports work on servers without
+# a display and inside pool workers. Frames come from trajectory logs (see robo_pursuit's Trajectory
+# Log), decimated to the video frame rate, and are written as a PNG sequence or as one raw RGB24
+# stream with a JSON sidecar, e.g. for ffmpeg:
+#   ffmpeg -f rawvideo -pix_fmt rgb24 -s 800x600 -r 30 -i run.rgb -pix_fmt yuv420p run.mp4
+VIDEO_FORMATS = ("png", "raw")
+
+
+def use_dummy_driver():
+    # Has to run before pygame initialises video; pool workers call it on start-up
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+
+def video_frame_indices(n_frames, sim_fps, fps):
+    # Log frame shown at each video frame; frame k of a log holds the state after step k - 1.
+    # The final state (e.g. the capture) is always the last video frame.
+    count = int((n_frames - 1) / sim_fps * fps) + 1
+    indices = np.minimum(np.round(np.arange(count) * sim_fps / fps).astype(int), n_frames - 1)
+    if indices[-1] != n_frames - 1:
+        indices = np.append(indices, n_frames - 1)
+    return indices
+
+
+def export_log(log_file, output, fmt="png", fps=30):
+    # output is a directory of frame_00000.png, ... for "png", or the stream file for "raw".
+    # Returns the number of video frames written.
+    if fmt not in VIDEO_FORMATS:
+        raise ValueError(f"Unknown video format: {fmt}")
+    use_dummy_driver()
+    import pygame
+
+    header, frames = read_trajectory_log(log_file)
+    sim_fps = header["sim_fps"]
+    indices = video_frame_indices(len(frames), sim_fps, fps)
+    session = DisplaySession(offscreen=True)
+    if fmt == "png":
+        os.makedirs(output, exist_ok=True)
+    else:
+        stream = open(output, "wb")
+    try:
+        for k, i in enumerate(indices):
+            agent_x, agent_y, heading, target_x, target_y = frames[i].astype(float)
+            session.erase()
+            drawn = [session.draw_target(target_x, target_y), session.draw_agent(agent_x, agent_y, heading)]
+            time_display = f"{header['strategy']} | Time: {max(i - 1, 0) / sim_fps:.2f}s"
+            if header["time_to_capture"] is not None and i == len(frames) - 1:
+                time_display += f" | Time to capture = {header['time_to_capture']:.2f}s"
+            drawn.append(session.draw_text(time_display))
+            session.present(drawn)
+
+            if fmt == "png":
+                pygame.image.save(session.screen, os.path.join(output, f"frame_{k:05d}.png"))
+            else:
+                stream.write(pygame.image.tobytes(session.screen, "RGB"))
+    finally:
+        if fmt == "raw":
+            stream.close()
+        session.close()
+
+    if fmt == "raw":
+        width, height = session.size
+        with open(output + ".json", "w") as f:
+            json.dump({"width": width, "height": height, "fps": fps, "pix_fmt": "rgb24", "frames": len(indices),
+                       "run": header}, f, indent=2)
+    return len(indices)
+
+
+def export_run(job, output_dir, name, fmt="png", fps=30, duration=60, keep_log=True):
+    # Simulates one sweep.SweepJob with a trajectory log, then renders the log
+    log_file = os.path.join(output_dir, name + ".rplog")
+    result = run_single_simulation(job.strategy, agent_start=job.scenario[0], target_start=job.scenario[1],
+                                   target_path=job.target_path, frame_delay=job.frame_delay, theta_CB=job.theta_CB,
+                                   Kp=job.Kp, Ki=job.Ki, Kd=job.Kd, duration=duration, verbose=False,
+                                   record_every=0, log_file=log_file)
+    output = os.path.join(output_dir, name if fmt == "png" else name + ".rgb")
+    frames = export_log(log_file, output, fmt=fmt, fps=fps)
+    if not keep_log:
+        os.remove(log_file)
+    return {"name": name, "output": output, "frames": frames, "log_file": log_file if keep_log else None,
+            "time_to_capture": result["time_to_capture"], "success": result["success"]}
+
+
+def export_runs(jobs, output_dir, fmt="png", fps=30, duration=60, max_workers=None, keep_log=True):
+    # Every job is simulated and rendered in its own worker; outputs are named <index>_<strategy>
+    # and come back in job order
+    os.makedirs(output_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=use_dummy_driver) as executor:
+        futures = [executor.submit(export_run, job, output_dir, f"{i:04d}_{job.strategy}", fmt, fps, duration,
+                                   keep_log)
+                   for i, job in enumerate(jobs)]
+        return [future.result() for future in futures]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a pursuit trajectory log to video frames")
+    parser.add_argument("log_file")
+    parser.add_argument("output", help="frame directory (png) or stream file (raw)")
+    parser.add_argument("--format", choices=VIDEO_FORMATS, default="png")
+    parser.add_argument("--fps", type=float, default=30, help="video frame rate")
+    args = parser.parse_args(argv)
+
+    frames = export_log(args.log_file, args.output, fmt=args.format, fps=args.fps)
+    print(f"Wrote {frames} frames to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())